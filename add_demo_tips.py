@@ -156,6 +156,7 @@ def add_demo_tips():
                 prediction, confidence, edge, kelly_pct, kelly_units, odds,
                 status, created_at
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (home_team, away_team, date) DO NOTHING
         ''', (
             tip["home_team"],
             tip["away_team"],
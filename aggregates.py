@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Running Performance Totals
+===========================================
+Keeps a single-row totals table and a settled-tips analytics cube
+(league x confidence x odds bucket x month) in step with the tips
+table, so stats reads never scan tips. Triggers update both in the
+same transaction as every insert, settlement or delete, whoever the
+writer is.
+
+Usage:
+  python3 aggregates.py rebuild    # Recompute totals from scratch
+"""
+
+import sqlite3
+import sys
+from typing import Dict, List, Optional
+
+import db
+
+# Contribution of one tips row (NEW or OLD) to each running total
+_CONTRIB = {
+    "total_tips": "1",
+    "pending": "({r}.status = 'pending')",
+    "resulted": "({r}.status = 'resulted')",
+    "wins": "({r}.status = 'resulted' AND {r}.win = 1)",
+    "staked": "(CASE WHEN {r}.status = 'resulted' THEN COALESCE({r}.kelly_units, 0) ELSE 0 END)",
+    "profit": """(CASE WHEN {r}.status != 'resulted' THEN 0
+                   WHEN {r}.win = 1 THEN COALESCE({r}.kelly_units, 0) * (COALESCE({r}.odds, 1) - 1)
+                   ELSE -COALESCE({r}.kelly_units, 0) END)""",
+}
+
+
+# Analytics cube dimensions and measures for one settled row
+ODDS_BUCKET = """(CASE WHEN {r}.odds < 1.5 THEN '1.0-1.5'
+                      WHEN {r}.odds < 2.0 THEN '1.5-2.0'
+                      WHEN {r}.odds < 3.0 THEN '2.0-3.0'
+                      ELSE '3.0+' END)"""
+
+CUBE_DIMENSIONS = {
+    "league": "COALESCE({r}.league, '')",
+    "confidence": "COALESCE({r}.confidence, '')",
+    "odds_bucket": ODDS_BUCKET,
+    "month": "COALESCE(substr({r}.date, 1, 7), '')",
+}
+
+CUBE_MEASURES = {
+    "tips": "1",
+    "wins": "({r}.win = 1)",
+    "staked": "COALESCE({r}.kelly_units, 0)",
+    "profit": _CONTRIB["profit"],
+}
+
+
+def _apply(row: str, sign: str) -> str:
+    """SET clause adding (+) or removing (-) one row's contribution."""
+    return ",\n".join(
+        f"{col} = {col} {sign} {expr.format(r=row)}" for col, expr in _CONTRIB.items()
+    )
+
+
+def _cube_key(row: str) -> str:
+    """WHERE clause matching a row's cube cell."""
+    return " AND ".join(f"{dim} = {expr.format(r=row)}" for dim, expr in CUBE_DIMENSIONS.items())
+
+
+def _cube_add(row: str) -> str:
+    """Upsert adding a settled row to its cube cell."""
+    dims = ", ".join(CUBE_DIMENSIONS)
+    values = ", ".join(
+        expr.format(r=row) for expr in list(CUBE_DIMENSIONS.values()) + list(CUBE_MEASURES.values())
+    )
+    updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in CUBE_MEASURES)
+
+    return f'''
+        INSERT INTO analytics_cube ({dims}, {", ".join(CUBE_MEASURES)})
+        SELECT {values} WHERE {row}.status = 'resulted'
+        ON CONFLICT ({dims}) DO UPDATE SET {updates};
+    '''
+
+
+def _cube_remove(row: str) -> str:
+    """Update taking a settled row out of its cube cell."""
+    updates = ", ".join(f"{col} = {col} - {expr.format(r=row)}" for col, expr in CUBE_MEASURES.items())
+
+    return f'''
+        UPDATE analytics_cube SET {updates}
+        WHERE {_cube_key(row)} AND {row}.status = 'resulted';
+    '''
+
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS performance_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_tips INTEGER NOT NULL DEFAULT 0,
+        pending INTEGER NOT NULL DEFAULT 0,
+        resulted INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        staked REAL NOT NULL DEFAULT 0,
+        profit REAL NOT NULL DEFAULT 0
+    )
+    ''',
+    "INSERT OR IGNORE INTO performance_totals (id) VALUES (1)",
+    '''
+    CREATE TABLE IF NOT EXISTS analytics_cube (
+        league TEXT NOT NULL,
+        confidence TEXT NOT NULL,
+        odds_bucket TEXT NOT NULL,
+        month TEXT NOT NULL,
+        tips INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        staked REAL NOT NULL DEFAULT 0,
+        profit REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (league, confidence, odds_bucket, month)
+    ) WITHOUT ROWID
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tips_totals_insert AFTER INSERT ON tips
+    BEGIN
+        UPDATE performance_totals SET {_apply("NEW", "+")} WHERE id = 1;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tips_totals_delete AFTER DELETE ON tips
+    BEGIN
+        UPDATE performance_totals SET {_apply("OLD", "-")} WHERE id = 1;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tips_totals_update
+    AFTER UPDATE OF status, win, kelly_units, odds ON tips
+    BEGIN
+        UPDATE performance_totals SET {_apply("OLD", "-")} WHERE id = 1;
+        UPDATE performance_totals SET {_apply("NEW", "+")} WHERE id = 1;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tips_cube_insert AFTER INSERT ON tips
+    WHEN NEW.status = 'resulted'
+    BEGIN
+        {_cube_add("NEW")}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tips_cube_delete AFTER DELETE ON tips
+    WHEN OLD.status = 'resulted'
+    BEGIN
+        {_cube_remove("OLD")}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tips_cube_update
+    AFTER UPDATE OF status, win, kelly_units, odds, league, confidence, date ON tips
+    WHEN OLD.status = 'resulted' OR NEW.status = 'resulted'
+    BEGIN
+        {_cube_remove("OLD")}
+        {_cube_add("NEW")}
+    END
+    ''',
+]
+
+
+def install(conn: sqlite3.Connection):
+    """Create the aggregate tables and triggers, seeding them on first install."""
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' "
+        "AND name IN ('performance_totals', 'analytics_cube')"
+    )}
+
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+    if len(existing) < 2:
+        rebuild(conn)
+
+
+def rebuild(conn: sqlite3.Connection):
+    """Recompute the totals row and the analytics cube from the tips table."""
+    columns = ", ".join(_CONTRIB)
+    sums = ", ".join(f"COALESCE(SUM({expr.format(r='tips')}), 0)" for expr in _CONTRIB.values())
+
+    conn.execute(f'''
+        INSERT OR REPLACE INTO performance_totals (id, {columns})
+        SELECT 1, {sums} FROM tips
+    ''')
+
+    dims = [expr.format(r="tips") for expr in CUBE_DIMENSIONS.values()]
+    measures = [f"SUM({expr.format(r='tips')})" for expr in CUBE_MEASURES.values()]
+
+    conn.execute("DELETE FROM analytics_cube")
+    conn.execute(f'''
+        INSERT INTO analytics_cube ({", ".join(CUBE_DIMENSIONS)}, {", ".join(CUBE_MEASURES)})
+        SELECT {", ".join(dims + measures)}
+        FROM tips WHERE status = 'resulted'
+        GROUP BY {", ".join(str(i + 1) for i in range(len(dims)))}
+    ''')
+
+
+def read_totals() -> Dict:
+    """Return the running totals as a dict."""
+    row = db.query_one(f"SELECT {', '.join(_CONTRIB)} FROM performance_totals WHERE id = 1")
+
+    if row is None:
+        return {col: 0 for col in _CONTRIB}
+
+    return dict(zip(_CONTRIB, row))
+
+
+def read_cube(group_by: List[str], filters: Optional[Dict] = None) -> List[tuple]:
+    """Roll the analytics cube up to group_by, optionally sliced by dimension values.
+
+    Rows are (*group_by values, count, wins, staked, profit, roi_pct).
+    """
+    for dim in list(group_by) + list(filters or {}):
+        if dim not in CUBE_DIMENSIONS:
+            raise ValueError(f"Unknown analytics dimension: {dim}")
+
+    where = ["tips > 0"]
+    params = []
+    for dim, value in (filters or {}).items():
+        where.append(f"{dim} = ?")
+        params.append(value)
+
+    select = list(group_by) + [
+        "SUM(tips)", "SUM(wins)", "ROUND(SUM(staked), 2)", "ROUND(SUM(profit), 2)",
+        "ROUND(CASE WHEN SUM(staked) > 0 THEN SUM(profit) / SUM(staked) * 100 ELSE 0 END, 2)"
+    ]
+    group = f"GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}" if group_by else ""
+
+    return db.query(f'''
+        SELECT {", ".join(select)} FROM analytics_cube
+        WHERE {" AND ".join(where)}
+        {group}
+    ''', params)
+
+
+def main():
+    """Command-line entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        db.write(rebuild)
+        print(f"✅ Totals rebuilt: {read_totals()}")
+    else:
+        print("Usage:")
+        print("  python3 aggregates.py rebuild    # Recompute totals from scratch")
+
+
+if __name__ == "__main__":
+    main()
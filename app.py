@@ -8,13 +8,29 @@ real-time odds, analytics, and bankroll management.
 
 import json
 import sqlite3
-import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
 import threading
 import time
 import os
+from contextlib import nullcontext
+
+import numpy as np
+
+import aggregates
+import backtest
+import db
+import jobs
+import markets
+import model
+import odds_history
+import ratings
+import settings
+import staking
+import stream
+import teamnames
+import upstream
 
 # Configuration
 CONFIG = {
@@ -24,13 +40,38 @@ CONFIG = {
     "kelly_fraction": 0.35,
     "max_kelly_pct": 0.075,
     "min_edge": 10,
+    "conf_mult": dict(staking.CONF_MULT),
+    "max_exposure_pct": 0.25,
     "min_confidence": "MEDIUM",
     "api_football": "cdc6bb9d446d48d387c2c827d8fda1e9",
     "api_odds": "c5f52c865fb2815f46380e1a2eb7fd5a",
 }
 
+# Editable CONFIG values, kept in step with the settings table
+SETTINGS = settings.SettingsStore(CONFIG)
+
+# Set by a server master that already migrated the schema before forking
+SCHEMA_READY_ENV = "BETTING_SCHEMA_READY"
+
 # Database path
-DB_PATH = "/home/bodins/.openclaw/workspace/betting_app/data/tips.db"
+DB_PATH = db.DB_PATH
+
+# Columns returned by list_tips
+TIP_COLUMNS = [
+    "id", "home_team", "away_team", "league", "date", "prediction", "confidence",
+    "edge", "kelly_pct", "kelly_units", "odds", "status", "actual_outcome", "score", "win"
+]
+
+class InvalidCursor(ValueError):
+    """A list_tips cursor that is not "<date>|<id>"."""
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    """Split a "<date>|<id>" paging cursor, raising InvalidCursor if malformed."""
+    cursor_date, sep, cursor_id = cursor.rpartition("|")
+    if not sep or not cursor_date or not cursor_id.isdigit():
+        raise InvalidCursor(cursor)
+    return cursor_date, int(cursor_id)
 
 @dataclass
 class Match:
@@ -46,6 +87,8 @@ class Match:
     home_odds: float
     draw_odds: float
     away_odds: float
+    matrix_key: Optional[Tuple] = None
+    market_odds: Dict[str, float] = field(default_factory=dict)
 
 @dataclass
 class Tip:
@@ -62,19 +105,40 @@ class Tip:
     score: Optional[str] = None
     win: Optional[bool] = None
 
+def no_stage(name: str):
+    """Default stage timer for callers that do not track progress."""
+    return nullcontext()
+
 class BettingApp:
     """Main betting application class."""
     
-    def __init__(self):
-        self.setup_database()
-        self.load_teams()
-        self.load_leagues()
+    def __init__(self, migrate: Optional[bool] = None):
+        self.matrices = markets.MatrixCache()
+        self.startup_ms = {}
+        
+        # No network here: the web server binds its port right after this
+        if migrate is None:
+            migrate = os.environ.get(SCHEMA_READY_ENV) != "1"
+        if migrate:
+            self._timed("schema", self.setup_database)
+        self._timed("settings", SETTINGS.refresh)
+        self._timed("teams", self.load_teams)
+        self._timed("leagues", self.load_leagues)
+        
+        print("Startup: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.startup_ms.items()))
+    
+    def _timed(self, name: str, fn: Callable):
+        """Run one startup phase and record how long it took."""
+        start = time.perf_counter()
+        fn()
+        self.startup_ms[name] = round((time.perf_counter() - start) * 1000, 2)
     
     def setup_database(self):
         """Initialize SQLite database."""
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        
-        conn = sqlite3.connect(DB_PATH)
+        db.write(self._create_schema)
+    
+    def _create_schema(self, conn: sqlite3.Connection):
+        """Create tables on the writer connection."""
         cursor = conn.cursor()
         
         # Tips table
@@ -94,10 +158,16 @@ class BettingApp:
                 status TEXT,
                 actual_outcome TEXT,
                 score TEXT,
-                created_at TEXT
+                created_at TEXT,
+                win INTEGER
             )
         ''')
         
+        # Databases created before the win column existed
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(tips)")]
+        if "win" not in columns:
+            cursor.execute("ALTER TABLE tips ADD COLUMN win INTEGER")
+        
         # Teams table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS teams (
@@ -131,65 +201,122 @@ class BettingApp:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Running performance totals
+        aggregates.install(conn)
+        
+        # Background job state
+        jobs.install(conn)
+        
+        # Historical fixtures for backtesting
+        backtest.install(conn)
+        
+        # Team rating columns, seed ratings and applied results
+        ratings.install(conn)
+        
+        # Odds price changes
+        odds_history.install(conn)
+        
+        # Indexes and fixture dedup
+        self._create_indexes(cursor)
+        
+        # Shared data version for response caches in every worker
+        self._create_version_triggers(cursor)
+        
+        # Live update events, which also bump the data version
+        stream.install(conn)
+        
+        # Settings version, so every worker reloads changed settings
+        settings.install(conn)
+        
+        # Teams version, so every worker reloads changed ratings
+        ratings.install_version(conn)
+    
+    def _create_version_triggers(self, cursor: sqlite3.Cursor):
+        """Bump meta.data_version on any write to data the API serves."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', 1)")
+        
+        for table in ("tips", "settings", "performance", "teams"):
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE meta SET value = value + 1 WHERE key = 'data_version';
+                    END
+                ''')
+    
+    def _create_indexes(self, cursor: sqlite3.Cursor):
+        """Create tips indexes, deduping fixtures before the unique key."""
+        has_fixture_key = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'ux_tips_fixture'"
+        ).fetchone()
+        
+        if not has_fixture_key:
+            # Keep one row per fixture: settled beats pending, then newest
+            cursor.execute('''
+                DELETE FROM tips WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY home_team, away_team, date
+                            ORDER BY status = 'resulted' DESC, id DESC
+                        ) AS rn
+                        FROM tips
+                    ) WHERE rn > 1
+                )
+            ''')
+            if cursor.rowcount:
+                print(f"Removed {cursor.rowcount} duplicate tips")
+        
+        # One tip per fixture; also serves update_results' team lookups
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_tips_fixture
+            ON tips (home_team, away_team, date)
+        ''')
+        
+        # /api/tips: pending tips by edge
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tips_status_edge
+            ON tips (status, edge DESC)
+        ''')
+        
+        # Keyset pages on (date, id), optionally narrowed by league or confidence
+        cursor.execute("DROP INDEX IF EXISTS idx_tips_status_date")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tips_status_date_id
+            ON tips (status, date, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tips_status_league_date_id
+            ON tips (status, league, date, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tips_status_confidence_date_id
+            ON tips (status, confidence, date, id)
+        ''')
+        
+        cursor.execute("PRAGMA optimize")
     
     def load_teams(self):
-        """Load team intelligence data."""
-        self.teams = {}
-        
-        # Premium teams database
-        premium_teams = {
-            # Premier League
-            "Manchester City": {"rating": 96, "form": "WWWWW", "home_adv": 9},
-            "Liverpool": {"rating": 94, "form": "WLWWW", "home_adv": 8},
-            "Arsenal": {"rating": 92, "form": "WWLDW", "home_adv": 8},
-            "Aston Villa": {"rating": 85, "form": "WWLWW", "home_adv": 7},
-            "Tottenham": {"rating": 86, "form": "LWWLW", "home_adv": 7},
-            "Chelsea": {"rating": 87, "form": "WLWLD", "home_adv": 7},
-            "Manchester United": {"rating": 84, "form": "LDLWL", "home_adv": 6},
-            "Newcastle": {"rating": 84, "form": "WWLWL", "home_adv": 6},
-            
-            # Bundesliga
-            "Bayern Munich": {"rating": 97, "form": "WWWWW", "home_adv": 9},
-            "Dortmund": {"rating": 90, "form": "WWLWW", "home_adv": 8},
-            "Leverkusen": {"rating": 89, "form": "WWWWD", "home_adv": 8},
-            "RB Leipzig": {"rating": 87, "form": "WLWWW", "home_adv": 7},
-            
-            # Serie A
-            "Inter Milan": {"rating": 93, "form": "WWWWW", "home_adv": 8},
-            "Juventus": {"rating": 89, "form": "WWLWD", "home_adv": 8},
-            "AC Milan": {"rating": 88, "form": "WLWWL", "home_adv": 7},
-            "Napoli": {"rating": 86, "form": "LWLLW", "home_adv": 7},
-            
-            # La Liga
-            "Real Madrid": {"rating": 96, "form": "WWWWW", "home_adv": 9},
-            "Barcelona": {"rating": 92, "form": "WLWWW", "home_adv": 8},
-            "Atletico Madrid": {"rating": 88, "form": "WWLDL", "home_adv": 7},
-            "Girona": {"rating": 84, "form": "LWWWW", "home_adv": 7},
-            
-            # Ligue 1
-            "PSG": {"rating": 93, "form": "WWWDW", "home_adv": 8},
-            "Monaco": {"rating": 85, "form": "LWWWW", "home_adv": 7},
-            "Lille": {"rating": 83, "form": "WLDWW", "home_adv": 6},
-            
-            # Eredivisie
-            "PSV Eindhoven": {"rating": 88, "form": "WWWWW", "home_adv": 8},
-            "Ajax": {"rating": 87, "form": "LWWWW", "home_adv": 8},
-            "Feyenoord": {"rating": 86, "form": "WWLDW", "home_adv": 7},
-            
-            # Primeira Liga
-            "Porto": {"rating": 88, "form": "WWWWW", "home_adv": 8},
-            "Benfica": {"rating": 87, "form": "WLWWW", "home_adv": 8},
-            "Sporting CP": {"rating": 86, "form": "WWLWD", "home_adv": 7},
-            
-            # Championship
-            "Leicester City": {"rating": 82, "form": "WWWWW", "home_adv": 6},
-            "Leeds United": {"rating": 80, "form": "WLWWW", "home_adv": 6},
-            "Southampton": {"rating": 79, "form": "WWLWL", "home_adv": 6},
-        }
+        """Load team ratings from the teams table."""
+        # Read the version first: a write racing the load just triggers another reload
+        self.teams_version = ratings.version()
+        self.teams = ratings.load()
         
-        self.teams.update(premium_teams)
+        # Ratings by normalized name, for feeds that spell clubs differently
+        self.team_index = teamnames.TeamIndex(self.teams)
+    
+    def refresh_teams(self) -> bool:
+        """Reload ratings if any process changed the teams table; True if reloaded."""
+        if ratings.version() == self.teams_version:
+            return False
+        self.load_teams()
+        return True
     
     def load_leagues(self):
         """Load league configurations."""
@@ -206,238 +333,260 @@ class BettingApp:
     
     def fetch_matches(self) -> List[Match]:
         """Fetch upcoming matches from Football-Data API."""
-        matches = []
-        
         try:
-            url = "https://api.football-data.org/v4/matches"
-            params = {
-                "status": "TIMED,Scheduled",
-                "dateFrom": datetime.now().strftime('%Y-%m-%d'),
-                "dateTo": (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
-            }
+            return self._parse_matches(self._request_matches())
+        except Exception as e:
+            print(f"Error fetching matches: {e}")
+            return []
+    
+    def _request_matches(self) -> Dict:
+        """Request the next seven days of fixtures."""
+        params = {
+            "status": "TIMED,Scheduled",
+            "dateFrom": datetime.now().strftime('%Y-%m-%d'),
+            "dateTo": (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d')
+        }
+        
+        response = upstream.get(
+            "football_data", "/matches",
+            params=params,
+            headers={"X-Auth-Token": CONFIG["api_football"]}
+        )
+        
+        return response.json() if response.status_code == 200 else {}
+    
+    def _parse_matches(self, data: Dict) -> List[Match]:
+        """Build priced Match objects from a Football-Data payload."""
+        fixtures = []
+        
+        for match in data.get("matches", []):
+            league_code = match.get("competition", {}).get("code", "OTHER")
             
-            response = requests.get(
-                url, 
-                headers={"X-Auth-Token": CONFIG["api_football"]},
-                params=params,
-                timeout=15
-            )
+            if league_code not in self.leagues:
+                continue
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                for match in data.get("matches", []):
-                    league_code = match.get("competition", {}).get("code", "OTHER")
-                    
-                    if league_code not in self.leagues:
-                        continue
-                    
-                    home = match["homeTeam"]["name"]
-                    away = match["awayTeam"]["name"]
-                    
-                    # Get team ratings
-                    home_rating = self.teams.get(home, {}).get("rating", 70)
-                    away_rating = self.teams.get(away, {}).get("rating", 70)
-                    
-                    # Calculate probabilities using Poisson model
-                    home_goals = max(0, (home_rating / 70) * 1.5 - (away_rating / 70) * 0.5)
-                    away_goals = max(0, (away_rating / 70) * 1.2 - (home_rating / 70) * 0.3)
-                    
-                    home_prob = self.poisson_probability(home_goals, away_goals)
-                    away_prob = self.poisson_probability(away_goals, home_goals)
-                    draw_prob = 1 - home_prob - away_prob
-                    
-                    # Normalize
-                    total = home_prob + draw_prob + away_prob
-                    home_prob /= total
-                    draw_prob /= total
-                    away_prob /= total
-                    
-                    matches.append(Match(
-                        home_team=home,
-                        away_team=away,
-                        league=self.leagues[league_code]["name"],
-                        date=match["utcDate"][:10],
-                        time=match["utcDate"][11:16],
-                        home_prob=round(home_prob * 100, 1),
-                        draw_prob=round(draw_prob * 100, 1),
-                        away_prob=round(away_prob * 100, 1),
-                        home_odds=0,
-                        draw_odds=0,
-                        away_odds=0
-                    ))
+            fixtures.append((match["homeTeam"]["name"], match["awayTeam"]["name"], league_code, match["utcDate"]))
+        
+        # Start clubs we have never seen at the default rating
+        unseen = {name for home, away, _, _ in fixtures for name in (home, away) if name not in self.team_index}
+        if unseen:
+            db.write(ratings.ensure, sorted(unseen))
+            self.load_teams()
+        
+        # One scoreline matrix per fixture, cached for the other markets
+        keys = [(
+            (teamnames.team_key(home), teamnames.team_key(away), utc_date),
+            self.team_index.get(home, {}).get("rating", model.DEFAULT_RATING),
+            self.team_index.get(away, {}).get("rating", model.DEFAULT_RATING)
+        ) for home, away, _, utc_date in fixtures]
+        probabilities = model.outcome_probabilities(self.matrices.get_many(keys)) * 100
         
-        except Exception as e:
-            print(f"Error fetching matches: {e}")
+        matches = []
+        for (home, away, league_code, utc_date), key, (home_prob, draw_prob, away_prob) in zip(fixtures, keys, probabilities):
+            matches.append(Match(
+                home_team=home,
+                away_team=away,
+                league=self.leagues[league_code]["name"],
+                date=utc_date[:10],
+                time=utc_date[11:16],
+                home_prob=round(float(home_prob), 1),
+                draw_prob=round(float(draw_prob), 1),
+                away_prob=round(float(away_prob), 1),
+                home_odds=0,
+                draw_odds=0,
+                away_odds=0,
+                matrix_key=key
+            ))
         
         return matches
     
-    def poisson_probability(self, goals_a: float, goals_b: float) -> float:
-        """Calculate Poisson probability for home win."""
-        import math
-        return (math.exp(-goals_a) * goals_a ** goals_b) / math.factorial(int(goals_b))
-    
     def fetch_odds(self, matches: List[Match]) -> List[Match]:
         """Fetch real odds from The Odds API."""
         try:
-            url = "https://api.the-odds-api.com/v4/sports/football/odds"
-            params = {
-                "apiKey": CONFIG["api_odds"],
-                "regions": "eu,uk",
-                "markets": "h2h",
-                "oddsFormat": "decimal"
-            }
-            
-            response = requests.get(url, params=params, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Create odds lookup
-                odds_lookup = {}
-                for event in data:
-                    match_key = (event.get("home_team"), event.get("away_team"))
-                    
-                    best_odds = {"1": 0, "X": 0, "2": 0}
-                    
-                    for bookmaker in event.get("bookmakers", []):
-                        for market in bookmaker.get("markets", []):
-                            if market.get("key") == "h2h":
-                                for outcome in market.get("outcomes", []):
-                                    if outcome["name"] == "Home":
-                                        best_odds["1"] = max(best_odds["1"], outcome["price"])
-                                    elif outcome["name"] == "Draw":
-                                        best_odds["X"] = max(best_odds["X"], outcome["price"])
-                                    elif outcome["Name"] == "Away":
-                                        best_odds["2"] = max(best_odds["2"], outcome["price"])
-                    
-                    if sum(best_odds.values()) > 0:
-                        odds_lookup[match_key] = best_odds
-                
-                # Apply odds to matches
-                for match in matches:
-                    match_key = (match.home_team, match.away_team)
-                    if match_key in odds_lookup:
-                        odds = odds_lookup[match_key]
-                        match.home_odds = odds["1"]
-                        match.draw_odds = odds["X"]
-                        match.away_odds = odds["2"]
-        
+            self._apply_odds(matches, self._request_odds())
         except Exception as e:
             print(f"Error fetching odds: {e}")
         
         return matches
     
+    def _request_odds(self) -> teamnames.FixtureIndex:
+        """Request 1X2, totals and handicap odds in one call and index the best prices by fixture."""
+        params = {
+            "apiKey": CONFIG["api_odds"],
+            "regions": "eu,uk",
+            "markets": markets.ODDS_API_MARKETS,
+            "oddsFormat": "decimal"
+        }
+        
+        response = upstream.get("odds_api", "/sports/football/odds", params=params)
+        
+        # Create odds lookup
+        odds_lookup = teamnames.FixtureIndex()
+        if response.status_code != 200:
+            return odds_lookup
+        
+        events = response.json()
+        
+        # Keep the price changes since the last poll; a cached payload has none
+        if not getattr(response, "from_cache", False):
+            try:
+                print(f"   Odds snapshot: {db.write(odds_history.record, events)}")
+            except Exception as e:
+                print(f"Error recording odds: {e}")
+        
+        for event in events:
+            best_odds = markets.parse_event(event)
+            
+            if sum(best_odds.values()) > 0:
+                odds_lookup.add(event.get("home_team"), event.get("away_team"), event.get("commence_time"), best_odds)
+        
+        return odds_lookup
+    
+    def _apply_odds(self, matches: List[Match], odds_lookup: teamnames.FixtureIndex):
+        """Copy looked-up prices onto matches."""
+        for match in matches:
+            odds = odds_lookup.get(match.home_team, match.away_team, f"{match.date}T{match.time}:00Z")
+            if odds:
+                match.home_odds = odds["1"]
+                match.draw_odds = odds["X"]
+                match.away_odds = odds["2"]
+                match.market_odds = {k: v for k, v in odds.items() if k not in ("1", "X", "2")}
+    
     def generate_tips(self, matches: List[Match]) -> List[Tip]:
         """Generate betting tips from matches."""
+        if not matches:
+            return []
+        
+        probs = np.array([[m.home_prob, m.draw_prob, m.away_prob] for m in matches])
+        odds = np.array([[m.home_odds, m.draw_odds, m.away_odds] for m in matches])
+        labels = ["Home Win", "Draw", "Away Win"]
+        
+        # Other markets come off the cached matrices. A push returns the stake,
+        # so each selection is priced by its win chance given no push.
+        if all(m.matrix_key for m in matches) and any(m.market_odds for m in matches):
+            win, push = markets.price(self.matrices.get_many([m.matrix_key for m in matches]))
+            probs = np.hstack([probs, win / (1 - push) * 100])
+            odds = np.hstack([odds, [[m.market_odds.get(s, 0) for s in markets.SELECTIONS] for m in matches]])
+            labels += markets.SELECTIONS
+        
+        # Evaluate every match x selection in one pass
+        result = staking.evaluate(
+            probs, odds,
+            min_edge=CONFIG["min_edge"],
+            kelly_fraction=CONFIG["kelly_fraction"],
+            max_kelly_pct=CONFIG["max_kelly_pct"],
+            conf_mult=CONFIG["conf_mult"]
+        )
+        
+        # Re-size bets settling on the same day jointly under the exposure cap
+        picked = np.flatnonzero(result["selected"])
+        result["kelly"][picked] = staking.allocate(
+            [matches[i].date for i in picked],
+            result["prob"][picked], result["odds"][picked], result["kelly"][picked],
+            cap=CONFIG["max_exposure_pct"]
+        )
+        
         tips = []
         
-        for match in matches:
-            if match.home_odds == 0:
-                continue
-            
-            # Find best value bet
-            bets = [
-                ("1", match.home_prob, match.home_odds),
-                ("X", match.draw_prob, match.draw_odds),
-                ("2", match.away_prob, match.away_odds)
-            ]
-            
-            best_bet = None
-            best_edge = -100
+        # Sorted by edge (best first)
+        for i in staking.rank(result):
+            kelly = float(result["kelly"][i])
             
-            for outcome, prob, odds in bets:
-                # Fair odds based on probability
-                fair_odds = 100 / prob
-                
-                # Edge calculation
-                edge = ((odds - fair_odds) / fair_odds) * 100
-                
-                if edge > best_edge:
-                    best_edge = edge
-                    best_bet = (outcome, prob, odds)
-            
-            if best_bet and best_edge >= CONFIG["min_edge"]:
-                outcome, prob, odds = best_bet
-                
-                # Determine confidence
-                if best_edge >= 25 and prob >= 60:
-                    confidence = "HIGH"
-                elif best_edge >= 15 or prob >= 50:
-                    confidence = "MEDIUM"
-                else:
-                    confidence = "LOW"
-                
-                # Kelly calculation
-                conf_mult = {"HIGH": 1.0, "MEDIUM": 0.7, "LOW": 0.4}
-                Kelly = ((odds - 1) * (prob / 100) - (1 - prob / 100)) / (odds - 1)
-                Kelly *= CONFIG["kelly_fraction"] * conf_mult[confidence]
-                Kelly = max(0, min(Kelly, CONFIG["max_kelly_pct"]))
-                
-                prediction_map = {"1": "Home Win", "X": "Draw", "2": "Away Win"}
-                
-                tip = Tip(
-                    match=match,
-                    prediction=prediction_map[outcome],
-                    confidence=confidence,
-                    edge=round(best_edge, 1),
-                    kelly_pct=round(Kelly * 100, 2),
-                    kelly_units=round(Kelly * CONFIG["bankroll"], 1),
-                    odds=odds
-                )
-                
-                tips.append(tip)
-        
-        # Sort by edge (best first)
-        tips.sort(key=lambda x: -x.edge)
+            tips.append(Tip(
+                match=matches[i],
+                prediction=labels[result["outcome"][i]],
+                confidence=str(staking.CONFIDENCE_LEVELS[result["confidence"][i]]),
+                edge=round(float(result["edge"][i]), 1),
+                kelly_pct=round(kelly * 100, 2),
+                kelly_units=round(kelly * CONFIG["bankroll"], 1),
+                odds=float(result["odds"][i])
+            ))
         
         return tips
     
     def save_tip(self, tip: Tip):
         """Save tip to database."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        self.save_tips([tip])
+    
+    def save_tips(self, tips: List[Tip]) -> Dict:
+        """Upsert a whole analysis run in one transaction."""
+        start = time.perf_counter()
+        counts = db.write(self._upsert_tips, tips)
+        counts["write_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return counts
+    
+    def _upsert_tips(self, conn: sqlite3.Connection, tips: List[Tip]) -> Dict:
+        """Upsert tip rows inside the caller's transaction."""
+        if not tips:
+            return {"inserted": 0, "updated": 0, "skipped": 0}
         
-        cursor.execute('''
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tips").fetchone()[0]
+        created_at = datetime.now().isoformat()
+        
+        cursor = conn.executemany('''
             INSERT INTO tips (
                 home_team, away_team, league, date,
                 prediction, confidence, edge, kelly_pct, kelly_units, odds,
                 status, created_at
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+            ON CONFLICT (home_team, away_team, date) DO UPDATE SET
+                league = excluded.league,
+                prediction = excluded.prediction,
+                confidence = excluded.confidence,
+                edge = excluded.edge,
+                kelly_pct = excluded.kelly_pct,
+                kelly_units = excluded.kelly_units,
+                odds = excluded.odds
+            WHERE tips.status = 'pending'
+        ''', [(
             tip.match.home_team, tip.match.away_team, tip.match.league,
             tip.match.date, tip.prediction, tip.confidence,
             tip.edge, tip.kelly_pct, tip.kelly_units, tip.odds,
-            tip.status, datetime.now().isoformat()
-        ))
+            tip.status, created_at
+        ) for tip in tips])
+        
+        # rowcount covers inserts and updates; new ids tell them apart
+        changed = cursor.rowcount
+        inserted = conn.execute("SELECT COUNT(*) FROM tips WHERE id > ?", (last_id,)).fetchone()[0]
         
-        conn.commit()
-        conn.close()
+        return {
+            "inserted": inserted,
+            "updated": changed - inserted,
+            "skipped": len(tips) - changed
+        }
     
-    def update_results(self):
-        """Update tip results from API."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+    def update_results(self, stage: Callable = no_stage):
+        """Update tip results from API.
+        
+        stage(name) returns a context manager timing each step (see jobs.Job).
+        Returns the tips settled by this run.
+        """
+        # Ratings may have moved in another worker
+        self.refresh_teams()
         
         # Get pending tips
-        cursor.execute("SELECT * FROM tips WHERE status = 'pending'")
-        pending = cursor.fetchall()
+        pending = db.query("SELECT * FROM tips WHERE status = 'pending'")
+        
+        settled = []
         
         # Fetch yesterday's results
         yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
         
         try:
-            url = f"https://api.football-data.org/v4/matches?dateFrom={yesterday}&dateTo={yesterday}"
-            response = requests.get(
-                url,
-                headers={"X-Auth-Token": CONFIG["api_football"]},
-                timeout=15
-            )
+            # Finished results do not change, so cache them for an hour
+            with stage("fetch_results"):
+                response = upstream.get(
+                    "football_data", "/matches",
+                    params={"dateFrom": yesterday, "dateTo": yesterday},
+                    headers={"X-Auth-Token": CONFIG["api_football"]},
+                    ttl=3600
+                )
             
             if response.status_code == 200:
                 data = response.json()
                 
-                results = {}
+                results = teamnames.FixtureIndex()
+                finished = []
                 for match in data.get("matches", []):
                     if match.get("status") == "FINISHED":
                         hg = match["score"]["fullTime"]["home"]
@@ -451,71 +600,83 @@ class BettingApp:
                             else:
                                 outcome = "X"
                             
-                            results[(match["homeTeam"]["name"], match["awayTeam"]["name"])] = {
+                            results.add(match["homeTeam"]["name"], match["awayTeam"]["name"], match.get("utcDate"), {
                                 "outcome": outcome,
-                                "score": f"{hg}-{ag}"
-                            }
+                                "score": f"{hg}-{ag}",
+                                "goals": (hg, ag)
+                            })
+                            finished.append((match["homeTeam"]["name"], match["awayTeam"]["name"], hg, ag, match.get("utcDate") or yesterday))
                 
                 # Update tips
+                updates = []
                 for tip in pending:
                     tip_id = tip[0]
                     home, away = tip[1], tip[2]
-                    key = (home, away)
+                    result = results.get(home, away, tip[4])
                     
-                    if key in results:
-                        actual = results[key]["outcome"]
-                        score = results[key]["score"]
+                    if result:
+                        actual = result["outcome"]
+                        score = result["score"]
                         
                         prediction_map = {"Home Win": "1", "Draw": "X", "Away Win": "2"}
-                        predicted = prediction_map.get(tip[5], "1")
+                        if tip[5] in prediction_map:
+                            win = prediction_map[tip[5]] == actual
+                        else:
+                            win = markets.settle(tip[5], *result["goals"])
                         
-                        win = predicted == actual
+                        # A pushed handicap or Draw No Bet returns the stake
+                        status = "void" if win is None else "resulted"
                         
-                        cursor.execute('''
-                            UPDATE tips SET 
-                                status = 'resulted',
-                                actual_outcome = ?,
-                                score = ?,
-                                win = ?
-                            WHERE id = ?
-                        ''', (actual, score, win, tip_id))
+                        updates.append((status, actual, score, win, tip_id))
                 
-                conn.commit()
+                print(f"   Results matched: {results.metrics()}")
+                
+                with stage("settle"):
+                    db.executemany('''
+                        UPDATE tips SET 
+                            status = ?,
+                            actual_outcome = ?,
+                            score = ?,
+                            win = ?
+                        WHERE id = ? AND status = 'pending'
+                    ''', updates)
+                settled = [
+                    {"id": tip_id, "status": status, "actual_outcome": actual, "score": score, "win": win}
+                    for status, actual, score, win, tip_id in updates
+                ]
+                
+                # Every finished match moves both clubs' ratings, once
+                with stage("ratings"):
+                    rated = db.write(ratings.apply_results, sorted(finished, key=lambda m: m[4]))
+                    if rated:
+                        self.load_teams()
+                print(f"   Ratings updated from {rated} new results")
         
         except Exception as e:
             print(f"Error updating results: {e}")
         
-        conn.close()
-        self.update_performance()
+        with stage("performance"):
+            self.update_performance()
+        
+        return settled
     
     def update_performance(self):
         """Update performance statistics."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM tips WHERE status = 'resulted'")
-        resulted = cursor.fetchall()
+        totals = aggregates.read_totals()
         
-        if not resulted:
-            conn.close()
+        if not totals["resulted"]:
             return
         
-        wins = len([t for t in resulted if t[14]])
-        total = len(resulted)
+        wins = totals["wins"]
+        total = totals["resulted"]
         accuracy = wins / total * 100 if total > 0 else 0
         
-        # Calculate ROI
-        roi = 0
-        for tip in resulted:
-            if tip[14]:  # win
-                roi += tip[9] * (tip[10] - 1)  # kelly_units * (odds - 1)
-            else:
-                roi -= tip[9]  # -kelly_units
-        
-        roi_pct = roi / CONFIG["bankroll"] * 100
+        # ROI = kelly_units * (odds - 1) per win, -kelly_units per loss
+        roi = totals["profit"]
+        roi_pct = roi / CONFIG["bankroll"] * 100 if CONFIG["bankroll"] > 0 else 0
         
         # Save performance
-        cursor.execute('''
+        db.execute('''
             INSERT INTO performance (
                 date, total_tips, wins, accuracy, roi, roi_pct, profit
             ) VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -523,121 +684,132 @@ class BettingApp:
             datetime.now().strftime('%Y-%m-%d'),
             total, wins, accuracy, roi, roi_pct, roi
         ))
-        
-        conn.commit()
-        conn.close()
     
     def get_performance(self) -> Dict:
         """Get performance statistics."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM tips WHERE status = 'resulted'")
-        resulted = cursor.fetchall()
+        totals = aggregates.read_totals()
+        history = db.query("SELECT * FROM performance ORDER BY id DESC LIMIT 30")
         
-        cursor.execute("SELECT * FROM tips")
-        all_tips = cursor.fetchall()
-        
-        cursor.execute("SELECT * FROM performance ORDER BY id DESC LIMIT 30")
-        history = cursor.fetchall()
-        
-        conn.close()
-        
-        total = len(resulted)
-        wins = len([t for t in resulted if t[14]]) if total > 0 else 0
-        pending = len([t for t in all_tips if t[11] == "pending"])
-        
-        roi = 0
-        for tip in resulted:
-            if tip[14]:
-                roi += tip[9] * (tip[10] - 1)
-            else:
-                roi -= tip[9]
+        total = totals["resulted"]
+        wins = totals["wins"]
+        roi = totals["profit"]
         
         return {
-            "total_tips": len(all_tips),
-            "pending": pending,
+            "total_tips": totals["total_tips"],
+            "pending": totals["pending"],
             "resulted": total,
             "wins": wins,
             "accuracy": round(wins / total * 100, 1) if total > 0 else 0,
             "roi": round(roi, 2),
-            "roi_pct": round(roi / CONFIG["bankroll"] * 100, 2),
+            "roi_pct": round(roi / CONFIG["bankroll"] * 100, 2) if CONFIG["bankroll"] > 0 else 0,
             "bankroll": CONFIG["bankroll"],
             "history": history[-30:]
         }
     
+    def list_tips(self, status: str, league: Optional[str] = None,
+                  confidence: Optional[List[str]] = None,
+                  min_odds: Optional[float] = None, max_odds: Optional[float] = None,
+                  date_from: Optional[str] = None, date_to: Optional[str] = None,
+                  cursor: Optional[str] = None, limit: int = 50,
+                  descending: bool = True) -> Tuple[List[Dict], Optional[str]]:
+        """Return one keyset page of tips ordered by (date, id) and the next cursor."""
+        where = ["status = ?"]
+        params = [status]
+        
+        if league:
+            where.append("league = ?")
+            params.append(league)
+        if confidence:
+            where.append(f"confidence IN ({', '.join('?' * len(confidence))})")
+            params.extend(confidence)
+        if min_odds is not None:
+            where.append("odds >= ?")
+            params.append(min_odds)
+        if max_odds is not None:
+            where.append("odds <= ?")
+            params.append(max_odds)
+        if date_from:
+            where.append("date >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("date <= ?")
+            params.append(date_to)
+        
+        # Cursor is "<date>|<id>" of the last row of the previous page
+        if cursor:
+            where.append(f"(date, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(parse_cursor(cursor))
+        
+        direction = "DESC" if descending else "ASC"
+        rows = db.query(f'''
+            SELECT {", ".join(TIP_COLUMNS)} FROM tips
+            WHERE {" AND ".join(where)}
+            ORDER BY date {direction}, id {direction}
+            LIMIT ?
+        ''', params + [limit + 1])
+        
+        page = [dict(zip(TIP_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = f"{page[-1]['date']}|{page[-1]['id']}"
+        
+        return page, next_cursor
+    
     def get_analytics(self) -> Dict:
-        """Get detailed analytics."""
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # By league
-        cursor.execute('''
-            SELECT league, COUNT(*) as count, 
-                SUM(CASE WHEN win = 1 THEN 1 ELSE 0 END) as wins
-            FROM tips WHERE status = 'resulted'
-            GROUP BY league
-        ''')
-        by_league = cursor.fetchall()
-        
-        # By confidence
-        cursor.execute('''
-            SELECT confidence, COUNT(*) as count,
-                SUM(CASE WHEN win = 1 THEN 1 ELSE 0 END) as wins
-            FROM tips WHERE status = 'resulted'
-            GROUP BY confidence
-        ''')
-        by_confidence = cursor.fetchall()
-        
-        # By odds range
-        cursor.execute('''
-            SELECT 
-                CASE 
-                    WHEN odds < 1.5 THEN '1.0-1.5'
-                    WHEN odds < 2.0 THEN '1.5-2.0'
-                    WHEN odds < 3.0 THEN '2.0-3.0'
-                    ELSE '3.0+'
-                END as range,
-                COUNT(*) as count,
-                SUM(CASE WHEN win = 1 THEN 1 ELSE 0 END) as wins
-            FROM tips WHERE status = 'resulted'
-            GROUP BY range
-        ''')
-        by_odds_range = cursor.fetchall()
-        
-        conn.close()
+        """Get detailed analytics.
         
+        Rolled up from the analytics cube; rows are
+        (key, count, wins, staked, profit, roi_pct).
+        """
         return {
-            "by_league": by_league,
-            "by_confidence": by_confidence,
-            "by_odds_range": by_odds_range
+            "by_league": aggregates.read_cube(["league"]),
+            "by_confidence": aggregates.read_cube(["confidence"]),
+            "by_odds_range": aggregates.read_cube(["odds_bucket"]),
+            "by_month": aggregates.read_cube(["month"])
         }
     
-    def run_analysis(self):
-        """Run full analysis and generate tips."""
+    def run_analysis(self, stage: Callable = no_stage):
+        """Run full analysis and generate tips.
+        
+        stage(name) returns a context manager timing each step (see jobs.Job).
+        """
         print(f"\n{'='*70}")
         print(f"  ⚽ {CONFIG['app_name']} v{CONFIG['version']}")
         print(f"  Bankroll: ${CONFIG['bankroll']} | Kelly: {CONFIG['kelly_fraction']*100:.0f}%")
         print(f"{'='*70}\n")
         
-        # Fetch matches
-        print("📡 Fetching matches...")
-        matches = self.fetch_matches()
-        print(f"   Found {len(matches)} matches")
+        # Price with the latest ratings, wherever they were updated
+        self.refresh_teams()
         
-        # Fetch odds
-        print("📡 Fetching odds...")
-        matches = self.fetch_odds(matches)
+        # Fetch matches and odds concurrently
+        print("📡 Fetching matches and odds...")
+        with stage("fetch"):
+            fetched = upstream.fetch_concurrently({
+                "matches": self._request_matches,
+                "odds": self._request_odds
+            })
+        
+        for name, outcome in fetched.items():
+            status = f"error: {outcome['error']}" if outcome["error"] else "ok"
+            print(f"   {name}: {outcome['ms']:.0f} ms ({status})")
         
         # Generate tips
         print("🧠 Generating ML predictions...")
-        tips = self.generate_tips(matches)
+        with stage("model"):
+            matches = self._parse_matches(fetched["matches"]["result"] or {})
+            odds_lookup = fetched["odds"]["result"] or teamnames.FixtureIndex()
+            self._apply_odds(matches, odds_lookup)
+            tips = self.generate_tips(matches)
+        print(f"   Found {len(matches)} matches")
+        print(f"   Odds matched: {odds_lookup.metrics()}")
         
         # Save tips
-        for tip in tips:
-            self.save_tip(tip)
+        with stage("save"):
+            saved = self.save_tips(tips)
         
         print(f"   Generated {len(tips)} high-value tips")
+        print(f"   Saved: {saved['inserted']} new, {saved['updated']} updated "
+              f"({saved['write_ms']:.1f} ms)")
         
         # Show top tips
         print(f"\n🎯 TOP {min(10, len(tips))} TIPS:\n")
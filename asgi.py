@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - ASGI Server
+============================
+Async serving mode for the same Flask app. Each request is read on the
+event loop and handed to a bounded thread pool, so a slow SQLite or
+upstream call holds one pool thread rather than a whole worker, and
+idle connections hold nothing. /api/stream is served natively: one task
+per process polls the data version and wakes every open stream, so
+thousands of dashboards cost a coroutine each, not a thread.
+
+Usage:
+  uvicorn asgi:app --host 0.0.0.0 --port $PORT
+  python3 asgi.py [port]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional
+
+import db
+import stream
+from web_server import app as flask_app
+
+THREADS = int(os.environ.get("ASGI_THREADS", 32))   # concurrent Flask requests per process
+MAX_BODY = 1024 * 1024                               # request bodies are small JSON
+
+
+class VersionWatch:
+    """One data-version poll per process, shared by every open stream."""
+
+    def __init__(self, interval: float = stream.POLL_INTERVAL):
+        self.interval = interval
+        self.version: Optional[int] = None
+        self._changed = asyncio.Event()
+
+    async def run(self, executor: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                current = await loop.run_in_executor(executor, db.data_version)
+                if current != self.version:
+                    self.version = current
+                    # Wake current waiters; later ones wait on a fresh event
+                    changed, self._changed = self._changed, asyncio.Event()
+                    changed.set()
+            except Exception as e:
+                print(f"Error polling data version: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def wait(self, seen: Optional[int]) -> int:
+        """Return once the version differs from seen (cancel to stop waiting)."""
+        while self.version == seen or self.version is None:
+            await self._changed.wait()
+        return self.version
+
+
+class AsgiApp:
+    """Flask on a thread pool, plus a native SSE endpoint."""
+
+    def __init__(self, wsgi_app, threads: int = THREADS):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.watch: Optional[VersionWatch] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+
+        self._start()
+        if scope["path"] == "/api/stream" and scope["method"] in ("GET", "HEAD"):
+            await self._stream(scope, receive, send)
+        else:
+            await self._wsgi(scope, receive, send)
+
+    def _start(self):
+        """Create the pool and version watcher on the running loop."""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="asgi")
+        if self._watcher is None:
+            self.watch = VersionWatch()
+            self._watcher = asyncio.get_running_loop().create_task(self.watch.run(self.executor))
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._watcher is not None:
+                    self._watcher.cancel()
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # Flask requests
+
+    async def _wsgi(self, scope, receive, send):
+        body = BytesIO()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.write(message.get("body", b""))
+            if body.tell() > MAX_BODY:
+                return await _respond(send, 413, b'{"error": "Request body too large"}')
+            if not message.get("more_body"):
+                break
+        body.seek(0)
+
+        environ = _environ(scope, body)
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(self.executor, self._run_wsgi, environ)
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+    def _run_wsgi(self, environ: Dict):
+        """Run one request through Flask in a pool thread; buffer the response."""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers]
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return started["status"], started["headers"], chunks
+
+    # Live updates
+
+    async def _stream(self, scope, receive, send):
+        """Async twin of stream.listen: same events, same Last-Event-ID resume."""
+        loop = asyncio.get_running_loop()
+        request_headers = {k.decode("latin1").lower(): v.decode("latin1") for k, v in scope.get("headers", [])}
+
+        headers = [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ]
+        if "origin" in request_headers:
+            headers.append((b"access-control-allow-origin", b"*"))
+
+        # HEAD gets the stream's headers and nothing else to wait for
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        try:
+            last_id = int(request_headers["last-event-id"])
+        except (KeyError, ValueError):
+            last_id = await loop.run_in_executor(self.executor, stream.latest_id)
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+
+        async def emit(text: str):
+            await send({"type": "http.response.body", "body": text.encode("utf-8"), "more_body": True})
+
+        async def events_since(last: int) -> List:
+            return await loop.run_in_executor(self.executor, stream.since, last)
+
+        disconnected = loop.create_task(_until_disconnect(receive))
+        try:
+            version = self.watch.version
+            tips = await loop.run_in_executor(self.executor, stream.tips_version)
+            await emit(f"retry: {stream.RETRY_MS}\n\n")
+
+            # Catch a reconnecting client up on what it missed
+            for event_id, kind, payload in await events_since(last_id):
+                last_id = event_id
+                await emit(stream.format_event(kind, payload, event_id))
+
+            deadline = time.monotonic() + stream.STREAM_LIFETIME
+            while time.monotonic() < deadline:
+                changed = loop.create_task(self.watch.wait(version))
+                timeout = min(stream.HEARTBEAT, deadline - time.monotonic())
+                await asyncio.wait({changed, disconnected}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if disconnected.done():
+                    changed.cancel()
+                    return
+
+                if not changed.done():
+                    changed.cancel()
+                    await emit(": keepalive\n\n")
+                    continue
+
+                current = changed.result()
+                first = version is None
+                version = current
+                if first:
+                    continue
+
+                events = await events_since(last_id)
+                for event_id, kind, payload in events:
+                    last_id = event_id
+                    await emit(stream.format_event(kind, payload, event_id))
+
+                # Same rule as stream.listen: only unannounced tip changes need a refetch
+                seen, tips = tips, await loop.run_in_executor(self.executor, stream.tips_version)
+                if not events and tips != seen:
+                    await emit(stream.format_event("version", json.dumps({"version": current})))
+
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            disconnected.cancel()
+
+
+async def _until_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _respond(send, status: int, body: bytes):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _environ(scope, body: BytesIO) -> Dict:
+    """WSGI environ for an ASGI HTTP scope."""
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1").upper().replace("-", "_")
+        value = value.decode("latin1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+    # The body is fully buffered and already de-chunked, so its length is known
+    environ.pop("HTTP_TRANSFER_ENCODING", None)
+    environ["CONTENT_LENGTH"] = str(len(body.getbuffer()))
+    return environ
+
+
+app = AsgiApp(flask_app)
+
+
+def main():
+    """Run under uvicorn."""
+    import uvicorn
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.environ.get("PORT", 5000))
+    uvicorn.run("asgi:app", host="0.0.0.0", port=port, timeout_keep_alive=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Static Asset Build and Delivery
+================================================
+The build step copies templates/ and static/ into build/, renames every
+static file after a hash of its content (app.css -> app.3f9c1e2a7b.css),
+points the templates at those names, and stores gzip and, when the
+brotli module is installed, brotli copies next to each file. A
+manifest records the names and ETags.
+
+At request time we pick the smallest encoding the client accepts and
+serve it from memory. Fingerprinted files never change under their
+name, so they are cached for a year as immutable; pages keep their URL
+and are revalidated, which costs a 304 when nothing was rebuilt.
+Without a build, files are served straight from the source folders.
+
+Usage:
+  python3 assets.py build
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from typing import Dict, Optional, Tuple
+
+from flask import Response, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.join(ROOT, "build")
+MANIFEST = os.path.join(BUILD_DIR, "manifest.json")
+SOURCES = ("templates", "static")
+
+HASH_LENGTH = 10
+MIN_COMPRESS_SIZE = 256      # smaller files are not worth a Content-Encoding
+COMPRESSIBLE = {".html", ".css", ".js", ".json", ".svg", ".txt", ".map", ".xml", ".webmanifest"}
+
+# Preferred first; identity is always available
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    """app.css -> app.<hash>.css"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{_digest(data)}{ext}"
+
+
+def _compress(encoding: str, data: bytes) -> Optional[bytes]:
+    if encoding == "gzip":
+        # mtime=0 keeps rebuilds of unchanged files byte-identical
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def _write(rel_path: str, data: bytes) -> Dict:
+    """Write one output file and its compressed copies; its manifest entry."""
+    path = os.path.join(BUILD_DIR, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+    encodings = []
+    if os.path.splitext(rel_path)[1].lower() in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+        for encoding, suffix in ENCODINGS:
+            packed = _compress(encoding, data)
+            if packed is not None and len(packed) < len(data):
+                with open(path + suffix, "wb") as f:
+                    f.write(packed)
+                encodings.append(encoding)
+
+    return {"etag": _digest(data), "size": len(data), "encodings": encodings}
+
+
+def _rewrite(text: str, names: Dict[str, str]) -> str:
+    """Point /static/<name> references at fingerprinted names."""
+    def swap(match):
+        return "/static/" + names.get(match.group(1), match.group(1))
+    return re.sub(r"/static/([\w./-]+)", swap, text)
+
+
+def build() -> Dict:
+    """Rebuild build/ from the source folders and write the manifest."""
+    if os.path.isdir(BUILD_DIR):
+        shutil.rmtree(BUILD_DIR)
+
+    sources = {}
+    for folder in SOURCES:
+        base = os.path.join(ROOT, folder)
+        for directory, _, files in os.walk(base):
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                rel = os.path.relpath(path, base).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    sources[(folder, rel)] = f.read()
+
+    # Static files first, so templates can refer to their new names
+    names = {
+        rel: fingerprint(rel, data)
+        for (folder, rel), data in sources.items() if folder == "static"
+    }
+
+    files = {}
+    for (folder, rel), data in sorted(sources.items()):
+        if folder == "static":
+            rel = names[rel]
+        if os.path.splitext(rel)[1].lower() in (".html", ".css", ".js"):
+            data = _rewrite(data.decode("utf-8"), names).encode("utf-8")
+        files[f"{folder}/{rel}"] = _write(f"{folder}/{rel}", data)
+
+    manifest = {"static": names, "files": files}
+    with open(MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetStore:
+    """Built files by path and encoding, read once per process."""
+
+    def __init__(self, build_dir: str = BUILD_DIR):
+        self.build_dir = build_dir
+        self.manifest: Optional[Dict] = None
+        self._bodies: Dict[Tuple[str, str], bytes] = {}
+
+        try:
+            with open(os.path.join(build_dir, "manifest.json")) as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading asset manifest: {e}")
+
+    def entry(self, rel_path: str) -> Optional[Dict]:
+        """Manifest entry for a built file, or None."""
+        if self.manifest is None:
+            return None
+        return self.manifest["files"].get(rel_path)
+
+    def static_name(self, name: str) -> Optional[str]:
+        """Fingerprinted name for a source static file."""
+        if self.manifest is None:
+            return None
+        return self.manifest["static"].get(name)
+
+    def body(self, rel_path: str, encoding: str) -> bytes:
+        key = (rel_path, encoding)
+        if key not in self._bodies:
+            suffix = dict(ENCODINGS).get(encoding, "")
+            with open(os.path.join(self.build_dir, rel_path + suffix), "rb") as f:
+                self._bodies[key] = f.read()
+        return self._bodies[key]
+
+
+_store: Optional[AssetStore] = None
+
+
+def store() -> AssetStore:
+    """The process-wide asset store."""
+    global _store
+    if _store is None:
+        _store = AssetStore()
+    return _store
+
+
+def negotiate(available) -> str:
+    """Best Content-Encoding for this request out of the built ones."""
+    for encoding, _ in ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return "identity"
+
+
+def _send(rel_path: str, entry: Dict, cache_control: str) -> Response:
+    encoding = negotiate(entry["encodings"])
+    etag = entry["etag"] if encoding == "identity" else f"{entry['etag']}-{encoding}"
+
+    headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304, headers=headers)
+        response.set_etag(etag)
+        return response
+
+    mimetype = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+    response = Response(store().body(rel_path, encoding), mimetype=mimetype, headers=headers)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.set_etag(etag)
+    return response
+
+
+def send_page(name: str) -> Response:
+    """A template served at a fixed URL; cached but always revalidated."""
+    entry = store().entry(f"templates/{name}")
+    if entry is None:
+        return send_from_directory(os.path.join(ROOT, "templates"), name, max_age=0)
+    return _send(f"templates/{name}", entry, REVALIDATE)
+
+
+def send_static(path: str) -> Response:
+    """A static file, immutable when requested by its fingerprinted name."""
+    entry = store().entry(f"static/{path}")
+    if entry is not None:
+        return _send(f"static/{path}", entry, IMMUTABLE)
+
+    # The plain name still works, but may change under the same URL
+    hashed = store().static_name(path)
+    if hashed is not None:
+        return _send(f"static/{hashed}", store().entry(f"static/{hashed}"), REVALIDATE)
+
+    return send_from_directory(os.path.join(ROOT, "static"), path, max_age=0)
+
+
+def main():
+    """Command-line entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        manifest = build()
+        for rel, entry in sorted(manifest["files"].items()):
+            print(f"  {rel:50} {entry['size']:>8} B  {', '.join(entry['encodings']) or 'identity'}")
+        if brotli is None:
+            print("brotli not installed; built gzip only")
+        print(f"Wrote {MANIFEST}")
+    else:
+        print("Usage:")
+        print("  python3 assets.py build    # Fingerprint and precompress into build/")
+
+
+if __name__ == "__main__":
+    main()
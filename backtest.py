@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Backtesting Engine
+===================================
+Replays stored historical fixtures, closing odds and results through the
+model and staking rules in date order, and reports the bankroll curve,
+ROI, drawdown and hit rate. Each league/season is an independent segment
+and segments run in parallel across a process pool.
+
+Ratings are rebuilt from history rather than taken from the teams table,
+which already knows every result being tested: each segment starts every
+club at DEFAULT_RATING, plays the league's earlier seasons through the
+same Elo update as live settlement, then prices each matchday before
+applying its results.
+
+Historical data lives in the `history` table and is loaded from
+football-data.co.uk style CSVs (Date, HomeTeam, AwayTeam, FTHG, FTAG and
+B365/Avg/PS 1X2 prices).
+
+Usage:
+  python3 backtest.py import <csv> --league "Premier League" [--season 2023-24]
+  python3 backtest.py run [--league L] [--season S] [--workers N]
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import db
+import model
+import ratings
+import staking
+import teamnames
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        league TEXT NOT NULL,
+        season TEXT NOT NULL,
+        date TEXT NOT NULL,
+        home_team TEXT NOT NULL,
+        away_team TEXT NOT NULL,
+        home_goals INTEGER NOT NULL,
+        away_goals INTEGER NOT NULL,
+        home_odds REAL,
+        draw_odds REAL,
+        away_odds REAL,
+        UNIQUE (league, date, home_team, away_team)
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_history_league_season_date ON history (league, season, date)",
+]
+
+# 1X2 price columns tried in order when importing a CSV
+ODDS_COLUMNS = [("B365H", "B365D", "B365A"), ("AvgH", "AvgD", "AvgA"), ("PSH", "PSD", "PSA")]
+
+
+def install(conn: sqlite3.Connection):
+    """Create the history table."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def season_of(date: str) -> str:
+    """European season label for an ISO date ("2023-08-12" -> "2023-24")."""
+    year, month = int(date[:4]), int(date[5:7])
+    start = year if month >= 7 else year - 1
+    return f"{start}-{str(start + 1)[2:]}"
+
+
+def _parse_date(value: str) -> str:
+    for fmt in ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognized date: {value!r}")
+
+
+def _price(row: Dict, column: str) -> Optional[float]:
+    try:
+        return float(row[column])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def import_csv(path: str, league: str, season: Optional[str] = None) -> int:
+    """Load a results + odds CSV into history. Returns rows written."""
+    rows = []
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            try:
+                date = _parse_date(row["Date"])
+                home_goals, away_goals = int(row["FTHG"]), int(row["FTAG"])
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            prices = (None, None, None)
+            for columns in ODDS_COLUMNS:
+                candidate = tuple(_price(row, c) for c in columns)
+                if all(candidate):
+                    prices = candidate
+                    break
+
+            rows.append((
+                league, season or season_of(date), date, row["HomeTeam"], row["AwayTeam"],
+                home_goals, away_goals, *prices
+            ))
+
+    db.executemany('''
+        INSERT INTO history (league, season, date, home_team, away_team,
+                             home_goals, away_goals, home_odds, draw_odds, away_odds)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (league, date, home_team, away_team) DO UPDATE SET
+            season = excluded.season,
+            home_goals = excluded.home_goals,
+            away_goals = excluded.away_goals,
+            home_odds = excluded.home_odds,
+            draw_odds = excluded.draw_odds,
+            away_odds = excluded.away_odds
+    ''', rows)
+    return len(rows)
+
+
+def segments(league: Optional[str] = None, season: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(league, season) pairs with stored history, oldest first."""
+    sql = "SELECT DISTINCT league, season FROM history WHERE 1 = 1"
+    params = []
+    if league:
+        sql += " AND league = ?"
+        params.append(league)
+    if season:
+        sql += " AND season = ?"
+        params.append(season)
+
+    return [tuple(row) for row in db.query(sql + " ORDER BY season, league", params)]
+
+
+def load_segment(league: str, season: str) -> Dict[str, np.ndarray]:
+    """Fixtures of one segment with a full 1X2 market, in kickoff order."""
+    rows = db.query('''
+        SELECT date, home_team, away_team, home_goals, away_goals, home_odds, draw_odds, away_odds
+        FROM history
+        WHERE league = ? AND season = ? AND home_odds > 1 AND draw_odds > 1 AND away_odds > 1
+        ORDER BY date, id
+    ''', (league, season))
+
+    goals = np.array([(r[3], r[4]) for r in rows], dtype=int).reshape(-1, 2)
+    return {
+        "date": np.array([r[0] for r in rows], dtype=str),
+        "home_team": [r[1] for r in rows],
+        "away_team": [r[2] for r in rows],
+        "goals": goals,
+        "result": np.sign(goals[:, 1] - goals[:, 0]) + 1,     # 0 = home, 1 = draw, 2 = away
+        "odds": np.array([r[5:8] for r in rows], dtype=float).reshape(-1, 3)
+    }
+
+
+def _earlier_results(league: str, before: str) -> List[Tuple]:
+    """Every stored result of a league before a date, priced or not, oldest first."""
+    return db.query('''
+        SELECT date, home_team, away_team, home_goals, away_goals FROM history
+        WHERE league = ? AND date < ?
+        ORDER BY date, id
+    ''', (league, before))
+
+
+def pre_match_ratings(data: Dict[str, np.ndarray], earlier: List[Tuple] = ()) -> Tuple[np.ndarray, np.ndarray]:
+    """Home and away rating going into each fixture, known only from earlier results.
+
+    Clubs start at DEFAULT_RATING and move with ratings.rating_change,
+    first through `earlier` (date, home, away, home_goals, away_goals)
+    rows, then matchday by matchday through data: every fixture on a date
+    is priced before any of that date's results are applied.
+    """
+    table: Dict[str, float] = {}
+
+    def apply(home, away, home_goals, away_goals):
+        home_key, away_key = teamnames.team_key(home), teamnames.team_key(away)
+        home_rating = table.get(home_key, model.DEFAULT_RATING)
+        away_rating = table.get(away_key, model.DEFAULT_RATING)
+        delta = ratings.rating_change(home_rating, away_rating, home_goals, away_goals)
+        table[home_key], table[away_key] = home_rating + delta, away_rating - delta
+
+    for _, home, away, home_goals, away_goals in earlier:
+        apply(home, away, home_goals, away_goals)
+
+    n = len(data["date"])
+    home_ratings, away_ratings = np.empty(n), np.empty(n)
+    dates = data["date"]
+    start = 0
+
+    while start < n:
+        end = start
+        while end < n and dates[end] == dates[start]:
+            end += 1
+        for i in range(start, end):
+            home_ratings[i] = table.get(teamnames.team_key(data["home_team"][i]), model.DEFAULT_RATING)
+            away_ratings[i] = table.get(teamnames.team_key(data["away_team"][i]), model.DEFAULT_RATING)
+        for i in range(start, end):
+            apply(data["home_team"][i], data["away_team"][i], *data["goals"][i])
+        start = end
+
+    return home_ratings, away_ratings
+
+
+def price_segment(league: str, data: Dict[str, np.ndarray]) -> np.ndarray:
+    """Model probabilities (percent) for a segment from ratings rebuilt up to each matchday."""
+    if len(data["date"]) == 0:
+        return np.zeros((0, 3))
+    earlier = _earlier_results(league, str(data["date"][0]))
+    return model.price_fixtures(*pre_match_ratings(data, earlier))
+
+
+def replay(data: Dict[str, np.ndarray], probs: np.ndarray, params: Dict,
+           bankroll: float) -> Dict:
+    """Stake the segment day by day from the running bankroll.
+
+    probs are model probabilities in percent, shaped (N, 3). Every bet
+    placed on a date is sized from the bankroll at the start of that date.
+    """
+    result = staking.evaluate(
+        probs, data["odds"],
+        min_edge=params["min_edge"],
+        kelly_fraction=params["kelly_fraction"],
+        max_kelly_pct=params["max_kelly_pct"],
+        conf_mult=params.get("conf_mult")
+    )
+
+    picked = np.flatnonzero(result["selected"] & (result["kelly"] > 0))
+    won = result["outcome"][picked] == data["result"][picked]
+    fraction = result["kelly"][picked]
+
+    if params.get("max_exposure_pct") is not None:
+        fraction = staking.allocate(data["date"][picked], result["prob"][picked],
+                                    result["odds"][picked], fraction, params["max_exposure_pct"])
+
+    returns = np.where(won, result["odds"][picked] - 1, -1.0)
+
+    # One bankroll step per matchday
+    dates = data["date"][picked]
+    days, starts = np.unique(dates, return_index=True)
+    ends = np.append(starts[1:], len(picked))
+
+    curve = [bankroll]
+    staked = 0.0
+    for start, end in zip(starts, ends):
+        stakes = fraction[start:end] * bankroll
+        staked += stakes.sum()
+        bankroll += float((stakes * returns[start:end]).sum())
+        curve.append(bankroll)
+
+    curve = np.array(curve)
+    peaks = np.maximum.accumulate(curve)
+    drawdown = (peaks - curve) / peaks
+
+    return {
+        "bets": int(len(picked)),
+        "wins": int(won.sum()),
+        "staked": float(staked),
+        "profit": float(curve[-1] - curve[0]),
+        "final_bankroll": float(curve[-1]),
+        "max_drawdown_pct": round(float(drawdown.max()) * 100, 2),
+        "curve": [{"date": d, "bankroll": round(float(b), 2)} for d, b in zip(days.tolist(), curve[1:])]
+    }
+
+
+def run_segment(task: Dict) -> Dict:
+    """Backtest one league/season. Runs inside a pool worker."""
+    db.DB_PATH = task["db_path"]
+    start = time.perf_counter()
+
+    data = load_segment(task["league"], task["season"])
+    probs = price_segment(task["league"], data)
+
+    report = replay(data, probs, task["params"], task["bankroll"])
+    report.update(
+        league=task["league"],
+        season=task["season"],
+        matches=len(data["date"]),
+        ms=round((time.perf_counter() - start) * 1000, 1)
+    )
+    return report
+
+
+def summarize(reports: List[Dict], bankroll: float) -> Dict:
+    """Totals across segments; each segment starts from the same bankroll."""
+    bets = sum(r["bets"] for r in reports)
+    wins = sum(r["wins"] for r in reports)
+    staked = sum(r["staked"] for r in reports)
+    profit = sum(r["profit"] for r in reports)
+
+    return {
+        "segments": len(reports),
+        "matches": sum(r["matches"] for r in reports),
+        "bets": bets,
+        "wins": wins,
+        "hit_rate": round(wins / bets * 100, 2) if bets else 0,
+        "staked": round(staked, 2),
+        "profit": round(profit, 2),
+        "roi_pct": round(profit / staked * 100, 2) if staked else 0,
+        "bankroll_growth_pct": round(profit / (bankroll * len(reports)) * 100, 2) if reports else 0,
+        "max_drawdown_pct": max((r["max_drawdown_pct"] for r in reports), default=0)
+    }
+
+
+def run(params: Dict, bankroll: float,
+        league: Optional[str] = None, season: Optional[str] = None,
+        workers: Optional[int] = None) -> Dict:
+    """Backtest every matching segment across a process pool."""
+    tasks = [{
+        "db_path": db.DB_PATH,
+        "league": seg_league,
+        "season": seg_season,
+        "params": params,
+        "bankroll": bankroll
+    } for seg_league, seg_season in segments(league, season)]
+
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        reports = [run_segment(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1)) as pool:
+            reports = list(pool.map(run_segment, tasks))
+
+    for report in reports:
+        report["hit_rate"] = round(report["wins"] / report["bets"] * 100, 2) if report["bets"] else 0
+        report["roi_pct"] = round(report["profit"] / report["staked"] * 100, 2) if report["staked"] else 0
+
+    return {
+        "params": params,
+        "summary": summarize(reports, bankroll),
+        "segments": reports,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Replay history through the model and staking rules")
+    sub = parser.add_subparsers(dest="command")
+
+    load = sub.add_parser("import", help="Load a football-data.co.uk CSV into history")
+    load.add_argument("path")
+    load.add_argument("--league", required=True)
+    load.add_argument("--season")
+
+    replay_cmd = sub.add_parser("run", help="Backtest stored history")
+    replay_cmd.add_argument("--league")
+    replay_cmd.add_argument("--season")
+    replay_cmd.add_argument("--workers", type=int)
+
+    args = parser.parse_args()
+
+    if args.command not in ("import", "run"):
+        parser.print_help()
+        sys.exit(1)
+
+    # Makes sure the history table exists and loads stored settings into CONFIG
+    from app import BettingApp, CONFIG
+    BettingApp()
+
+    if args.command == "import":
+        count = import_csv(args.path, args.league, args.season)
+        print(f"✅ Imported {count} fixtures into history")
+        return
+
+    params = {k: CONFIG[k] for k in ("min_edge", "kelly_fraction", "max_kelly_pct", "max_exposure_pct")}
+    params["conf_mult"] = CONFIG["conf_mult"]
+    report = run(params, CONFIG["bankroll"], args.league, args.season, args.workers)
+
+    for seg in report["segments"]:
+        print(f"   {seg['season']} {seg['league']}: {seg['bets']} bets | "
+              f"hit {seg['hit_rate']}% | ROI {seg['roi_pct']:+.2f}% | "
+              f"max DD {seg['max_drawdown_pct']}% | ${seg['final_bankroll']:.2f}")
+
+    summary = report["summary"]
+    print(f"\n📊 {summary['segments']} segments, {summary['matches']} matches, {summary['bets']} bets "
+          f"in {report['elapsed_ms']}ms")
+    print(f"   Hit rate: {summary['hit_rate']}% | ROI: {summary['roi_pct']:+.2f}% | "
+          f"Max drawdown: {summary['max_drawdown_pct']}%")
+
+
+if __name__ == "__main__":
+    main()
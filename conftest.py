@@ -0,0 +1,36 @@
+"""
+Pytest setup: point the data layer at a throwaway database before any
+app module is imported, so tests never touch the real tips.db.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+import db
+
+db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="betting-tests-"), "data", "tips.db")
+
+# test_app.py is a smoke script for the deployed app, not a pytest module
+collect_ignore = ["test_app.py"]
+
+
+@pytest.fixture(scope="session")
+def web():
+    """The web_server module, imported once against the test database."""
+    import web_server
+    return web_server
+
+
+@pytest.fixture
+def client(web):
+    return web.app.test_client()
+
+
+@pytest.fixture
+def no_tips(web):
+    """An empty tips table, emptied again afterwards."""
+    db.execute("DELETE FROM tips")
+    yield
+    db.execute("DELETE FROM tips")
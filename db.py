@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Data Access Layer
+==================================
+Pooled, WAL-mode SQLite access shared by BettingApp and the web server.
+
+Reads use one long-lived connection per thread. Writes are funnelled
+through a single writer thread per process, which group-commits
+whatever is queued into one IMMEDIATE transaction.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Sequence
+
+# Database path
+DB_PATH = "/home/bodins/.openclaw/workspace/betting_app/data/tips.db"
+
+# Connection tuning
+PRAGMAS = [
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),      # WAL makes NORMAL crash-safe
+    ("cache_size", "-16000"),       # ~16 MB page cache per connection
+    ("mmap_size", "134217728"),     # 128 MB memory-mapped reads
+    ("temp_store", "MEMORY"),
+    ("foreign_keys", "ON"),
+]
+BUSY_TIMEOUT = 10.0          # seconds to wait on another process' write lock
+STATEMENT_CACHE = 256        # prepared statements kept per connection
+MAX_WRITE_BATCH = 64         # queued writes committed together
+
+
+def connect() -> sqlite3.Connection:
+    """Open a new tuned connection to DB_PATH."""
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE
+    )
+
+    for pragma, value in PRAGMAS:
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+    return conn
+
+
+class ConnectionPool:
+    """Per-thread read connections, reopened after fork or path change."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+
+    def get(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        local = self._local
+
+        if getattr(local, "conn", None) is None or local.key != (os.getpid(), DB_PATH):
+            local.conn = connect()
+            local.key = (os.getpid(), DB_PATH)
+
+            with self._lock:
+                self._all.append(local.conn)
+
+        return local.conn
+
+    def close_all(self):
+        """Close every connection opened by this process."""
+        with self._lock:
+            for conn in self._all:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all = []
+
+        self._local = threading.local()
+
+
+class WriteQueue:
+    """Single writer thread that group-commits queued write jobs."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(conn, *args, **kwargs) to run inside a write transaction."""
+        future = Future()
+
+        # Nested writes from inside a job run inline in the same transaction
+        if threading.current_thread() is self._thread:
+            try:
+                future.set_result(fn(self._conn, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+
+        self._ensure_thread()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def _ensure_thread(self):
+        """Start the writer thread (again, after a fork)."""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 10.0):
+        """Finish queued writes, stop the writer thread and close its connection."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            if thread is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+            self._queue.put(None)
+
+        thread.join(timeout)
+
+    def _run(self):
+        """Writer loop: drain the queue and commit each batch once; None stops it."""
+        self._conn = connect()
+        stopping = False
+
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+
+            while len(batch) < MAX_WRITE_BATCH:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+
+            self._commit_batch(batch)
+
+        self._conn.close()
+        self._conn = None
+
+    def _commit_batch(self, batch: List):
+        """Run a batch in one transaction, isolating failures with savepoints."""
+        conn = self._conn
+        results = []
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+
+            for fn, args, kwargs, future in batch:
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, fn(conn, *args, **kwargs), None))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    results.append((future, None, e))
+
+            conn.execute("COMMIT")
+
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+pool = ConnectionPool()
+writer = WriteQueue()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Return the calling thread's pooled connection."""
+    return pool.get()
+
+
+def query(sql: str, params: Sequence = ()) -> List[tuple]:
+    """Run a read query and return all rows."""
+    return pool.get().execute(sql, params).fetchall()
+
+
+def query_one(sql: str, params: Sequence = ()) -> Optional[tuple]:
+    """Run a read query and return the first row."""
+    return pool.get().execute(sql, params).fetchone()
+
+
+def write(fn: Callable, *args, **kwargs) -> Any:
+    """Run fn(conn, ...) in a write transaction and wait for its result."""
+    return writer.submit(fn, *args, **kwargs).result()
+
+
+def execute(sql: str, params: Sequence = ()) -> int:
+    """Run a single write statement and return the affected row count."""
+    return write(lambda conn: conn.execute(sql, params).rowcount)
+
+
+def executemany(sql: str, rows: Sequence[Sequence]) -> int:
+    """Run one write statement for many rows in a single transaction."""
+    return write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+
+def data_version() -> int:
+    """Return the shared data version, bumped by triggers on every data write."""
+    row = query_one("SELECT value FROM meta WHERE key = 'data_version'")
+    return row[0] if row else 0
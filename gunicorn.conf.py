@@ -0,0 +1,56 @@
+"""
+Betting Pro AI - Gunicorn Settings
+==================================
+Read automatically by `gunicorn web_server:app` from this directory.
+
+The app is preloaded: the master imports web_server once, which
+migrates the schema and loads settings, teams and leagues, then forks
+workers that share that state copy-on-write. No phase touches the
+network, so the port binds as soon as the import finishes. With
+preloading turned off, the master still migrates in on_starting and
+workers skip it.
+"""
+
+import os
+import time
+
+STARTED = time.perf_counter()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads = 8
+timeout = 30
+preload_app = True
+
+
+def _ms(since: float) -> str:
+    return f"{(time.perf_counter() - since) * 1000:.0f} ms"
+
+
+def on_starting(server):
+    """Master, before binding: make sure the schema exists, once."""
+    from app import BettingApp, SCHEMA_READY_ENV
+
+    if not server.cfg.preload_app:
+        BettingApp(migrate=True)
+    os.environ[SCHEMA_READY_ENV] = "1"
+    server.log.info("Startup: app loaded after %s", _ms(STARTED))
+
+
+def when_ready(server):
+    """Master, listening: report time to port bind."""
+    server.log.info("Startup: listening after %s", _ms(STARTED))
+
+
+def pre_fork(server, worker):
+    """Master: stop the writer and drop read connections so no worker inherits an open SQLite handle."""
+    import db
+    db.writer.close()
+    db.pool.close_all()
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    """Worker: report how long it took to become ready after fork."""
+    worker.log.info("Startup: worker %s ready %s after fork", worker.pid, _ms(worker.forked_at))
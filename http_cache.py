@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - On-Disk HTTP Cache
+===================================
+Upstream responses stored next to the database, one JSON file per
+URL + params, so every worker and every cron run shares them. Entries
+past MAX_AGE are no use even as a fallback and are deleted when read,
+and a write sweeps the directory for them every few minutes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+import db
+
+# Query params that never take part in the cache key
+SECRET_PARAMS = {"apiKey"}
+
+MAX_AGE = 24 * 3600          # oldest copy worth keeping, as a fallback when the upstream is down
+SWEEP_INTERVAL = 600         # seconds between directory sweeps per process
+
+_last_sweep = 0.0
+
+
+def cache_dir() -> str:
+    """Directory holding cached responses."""
+    return os.path.join(os.path.dirname(db.DB_PATH), "http_cache")
+
+
+def cache_key(url: str, params: Optional[Dict]) -> str:
+    """Stable key for a URL and its non-secret params."""
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+    raw = url + "?" + "&".join(f"{k}={v}" for k, v in items)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _path(key: str) -> str:
+    return os.path.join(cache_dir(), f"{key}.json")
+
+
+def load(key: str) -> Optional[Dict]:
+    """Return the cached entry for key, or None."""
+    path = _path(key)
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if age(entry) >= MAX_AGE:
+        _remove(path)
+        return None
+    return entry
+
+
+def store(key: str, url: str, body: str, etag: Optional[str] = None,
+          last_modified: Optional[str] = None) -> Dict:
+    """Atomically write a 200 response body and its validators."""
+    entry = {
+        "url": url,
+        "body": body,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": time.time()
+    }
+    _write(key, entry)
+    return entry
+
+
+def touch(key: str, entry: Dict) -> Dict:
+    """Mark an entry fresh again after a 304 revalidation."""
+    entry["fetched_at"] = time.time()
+    _write(key, entry)
+    return entry
+
+
+def age(entry: Dict) -> float:
+    """Seconds since the entry was fetched or revalidated."""
+    return time.time() - entry.get("fetched_at", 0)
+
+
+def _write(key: str, entry: Dict):
+    """Write via a temp file and rename so readers never see partial JSON."""
+    directory = cache_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, _path(key))
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    _sweep(directory)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _sweep(directory: str):
+    """Delete entries and leftover temp files older than MAX_AGE, at most once per interval."""
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < SWEEP_INTERVAL:
+        return
+    _last_sweep = now
+
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+
+    for name in names:
+        if not name.endswith((".json", ".tmp")):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            expired = now - os.path.getmtime(path) >= MAX_AGE
+        except OSError:
+            continue
+        if expired:
+            _remove(path)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Background Jobs
+================================
+Runs analysis and settlement off the request thread. Job state lives
+in SQLite so any worker can report it, and a partial unique index lets
+only one job of each kind be active across all workers.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+import db
+
+# Running jobs beat every HEARTBEAT_INTERVAL; one silent for STALE_AFTER is presumed dead
+HEARTBEAT_INTERVAL = 30
+STALE_AFTER = 2 * 60
+
+# Finished jobs (and their result payloads) are deleted after this long
+RETENTION = 7 * 24 * 3600
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL,
+        stages TEXT NOT NULL DEFAULT '[]',
+        result TEXT,
+        error TEXT,
+        created_at REAL NOT NULL,
+        started_at REAL,
+        finished_at REAL,
+        heartbeat REAL
+    )
+    ''',
+    # Single-flight: at most one queued/running job per kind
+    '''
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_active
+    ON jobs (kind) WHERE status IN ('queued', 'running')
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_jobs_kind_created ON jobs (kind, created_at)",
+]
+
+
+def install(conn: sqlite3.Connection):
+    """Create the jobs table."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+class Job:
+    """Handle passed to job functions for reporting stage timings."""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage and publish progress as it starts and ends."""
+        entry = {"name": name, "status": "running", "ms": None}
+        self.stages.append(entry)
+        self._save()
+
+        start = time.perf_counter()
+        try:
+            yield
+            entry["status"] = "done"
+        except Exception:
+            entry["status"] = "failed"
+            raise
+        finally:
+            entry["ms"] = round((time.perf_counter() - start) * 1000, 1)
+            self._save()
+
+    def _save(self):
+        db.execute(
+            "UPDATE jobs SET stages = ?, heartbeat = ? WHERE id = ?",
+            (json.dumps(self.stages), time.time(), self.id)
+        )
+
+
+def _claim(conn: sqlite3.Connection, kind: str) -> Tuple[str, bool]:
+    """Insert a queued job, or return the active one for kind."""
+    now = time.time()
+
+    # Free the slot held by a job whose worker died
+    conn.execute('''
+        UPDATE jobs SET status = 'failed', error = 'abandoned', finished_at = ?
+        WHERE kind = ? AND status IN ('queued', 'running') AND COALESCE(heartbeat, created_at) < ?
+    ''', (now, kind, now - STALE_AFTER))
+
+    conn.execute(
+        "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (now - RETENTION,)
+    )
+
+    active = conn.execute(
+        "SELECT id FROM jobs WHERE kind = ? AND status IN ('queued', 'running')", (kind,)
+    ).fetchone()
+    if active:
+        return active[0], False
+
+    job_id = uuid.uuid4().hex
+    conn.execute(
+        "INSERT INTO jobs (id, kind, status, created_at, heartbeat) VALUES (?, ?, 'queued', ?, ?)",
+        (job_id, kind, now, now)
+    )
+    return job_id, True
+
+
+def submit(kind: str, fn: Callable[[Job], Dict]) -> Tuple[str, bool]:
+    """Start fn(job) in a background thread unless a kind job is already active.
+
+    Returns (job_id, started); started is False when an active job was reused.
+    """
+    job_id, started = db.write(_claim, kind)
+
+    if started:
+        thread = threading.Thread(target=_run, args=(job_id, fn), name=f"job-{kind}", daemon=True)
+        thread.start()
+
+    return job_id, started
+
+
+def _run(job_id: str, fn: Callable[[Job], Dict]):
+    """Execute a claimed job and record its outcome."""
+    job = Job(job_id)
+    db.execute(
+        "UPDATE jobs SET status = 'running', started_at = ?, heartbeat = ? WHERE id = ?",
+        (time.time(), time.time(), job_id)
+    )
+
+    # Beat while fn runs, so a long stage is not mistaken for a dead worker
+    finished = threading.Event()
+    threading.Thread(target=_beat, args=(job_id, finished), name="job-heartbeat", daemon=True).start()
+
+    try:
+        result = fn(job)
+        db.execute(
+            "UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+    except Exception as e:
+        traceback.print_exc()
+        db.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (str(e), time.time(), job_id)
+        )
+    finally:
+        finished.set()
+
+
+def _beat(job_id: str, finished: threading.Event):
+    """Refresh a running job's heartbeat until it finishes."""
+    while not finished.wait(HEARTBEAT_INTERVAL):
+        try:
+            db.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+        except Exception as e:
+            print(f"Error updating job heartbeat: {e}")
+
+
+def get(job_id: str) -> Optional[Dict]:
+    """Return a job's status, stage timings and result."""
+    row = db.query_one(
+        "SELECT id, kind, status, stages, result, error, created_at, started_at, finished_at "
+        "FROM jobs WHERE id = ?", (job_id,)
+    )
+    if row is None:
+        return None
+
+    created_at, started_at, finished_at = row[6], row[7], row[8]
+    end = finished_at or time.time()
+
+    return {
+        "id": row[0],
+        "kind": row[1],
+        "status": row[2],
+        "stages": json.loads(row[3]),
+        "result": json.loads(row[4]) if row[4] else None,
+        "error": row[5],
+        "queued_ms": round(((started_at or end) - created_at) * 1000, 1),
+        "elapsed_ms": round((end - started_at) * 1000, 1) if started_at else None
+    }
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Market Engine
+==============================
+Every market we price is read off the same home x away scoreline matrix:
+Over/Under, Both Teams To Score, correct score, Asian handicap and Draw
+No Bet. Matrices are built once per fixture and kept in an LRU cache, so
+adding markets costs a few array sums rather than another model run.
+
+Selections carry a win and a push (stake returned) probability; whole
+handicap lines and Draw No Bet can push, half lines cannot.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import model
+
+# Markets requested from The Odds API in one call
+ODDS_API_MARKETS = "h2h,totals,spreads"
+
+TOTAL_LINES = [0.5, 1.5, 2.5, 3.5, 4.5]
+HANDICAP_LINES = [-2.5, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+CORRECT_SCORE_GOALS = 4          # correct scores 0-0 .. 4-4
+
+MATRIX_CACHE_SIZE = 4096
+
+
+def format_line(line: float) -> str:
+    """Signed handicap label: -0.5 -> "-0.5", 1.0 -> "+1", 0.0 -> "0"."""
+    return "0" if line == 0 else f"{line:+g}"
+
+
+def _selections() -> List[str]:
+    names = []
+    for line in TOTAL_LINES:
+        names += [f"Over {line:g}", f"Under {line:g}"]
+    names += ["BTTS Yes", "BTTS No"]
+    for line in HANDICAP_LINES:
+        names += [f"AH Home {format_line(line)}", f"AH Away {format_line(-line)}"]
+    names += ["DNB Home", "DNB Away"]
+    for home in range(CORRECT_SCORE_GOALS + 1):
+        for away in range(CORRECT_SCORE_GOALS + 1):
+            names.append(f"Correct Score {home}-{away}")
+    return names
+
+
+# Every selection price() returns, in column order (1X2 is priced by the model)
+SELECTIONS = _selections()
+SELECTION_INDEX = {name: i for i, name in enumerate(SELECTIONS)}
+
+
+def goal_difference(matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """P(home goals - away goals = d) per fixture, with the d values."""
+    size = matrices.shape[-1]
+    values = np.arange(-(size - 1), size)
+    dist = np.stack([np.diagonal(matrices, offset=-d, axis1=1, axis2=2).sum(axis=-1) for d in values], axis=1)
+    return dist, values
+
+
+def total_goals(matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """P(home goals + away goals = t) per fixture, with the t values."""
+    size = matrices.shape[-1]
+    flipped = matrices[:, :, ::-1]
+    values = np.arange(0, 2 * size - 1)
+    dist = np.stack([np.diagonal(flipped, offset=size - 1 - t, axis1=1, axis2=2).sum(axis=-1) for t in values], axis=1)
+    return dist, values
+
+
+def price(matrices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Win and push probabilities for every SELECTION, each shaped (N, S)."""
+    n = matrices.shape[0]
+    win = np.zeros((n, len(SELECTIONS)))
+    push = np.zeros((n, len(SELECTIONS)))
+
+    def put(name, won, pushed=None):
+        win[:, SELECTION_INDEX[name]] = won
+        if pushed is not None:
+            push[:, SELECTION_INDEX[name]] = pushed
+
+    totals, total_values = total_goals(matrices)
+    for line in TOTAL_LINES:
+        put(f"Over {line:g}", totals[:, total_values > line].sum(axis=1), totals[:, total_values == line].sum(axis=1))
+        put(f"Under {line:g}", totals[:, total_values < line].sum(axis=1), totals[:, total_values == line].sum(axis=1))
+
+    neither = matrices[:, 0, :].sum(axis=1) + matrices[:, :, 0].sum(axis=1) - matrices[:, 0, 0]
+    put("BTTS Yes", 1 - neither)
+    put("BTTS No", neither)
+
+    # Home -h wins when d > h; the away side of the same line wins when d < h
+    diff, diff_values = goal_difference(matrices)
+    for line in HANDICAP_LINES:
+        level = diff[:, diff_values == -line].sum(axis=1)
+        put(f"AH Home {format_line(line)}", diff[:, diff_values > -line].sum(axis=1), level)
+        put(f"AH Away {format_line(-line)}", diff[:, diff_values < -line].sum(axis=1), level)
+
+    draw = diff[:, diff_values == 0].sum(axis=1)
+    put("DNB Home", diff[:, diff_values > 0].sum(axis=1), draw)
+    put("DNB Away", diff[:, diff_values < 0].sum(axis=1), draw)
+
+    for home in range(CORRECT_SCORE_GOALS + 1):
+        for away in range(CORRECT_SCORE_GOALS + 1):
+            put(f"Correct Score {home}-{away}", matrices[:, home, away])
+
+    return win, push
+
+
+def settle(selection: str, home_goals: int, away_goals: int) -> Optional[bool]:
+    """Whether a selection won for a final score; None when the stake is returned."""
+    total, diff = home_goals + away_goals, home_goals - away_goals
+
+    if selection.startswith(("Over ", "Under ")):
+        line = float(selection.split()[1])
+        if total == line:
+            return None
+        return total > line if selection.startswith("Over") else total < line
+
+    if selection.startswith("BTTS "):
+        both = home_goals > 0 and away_goals > 0
+        return both if selection.endswith("Yes") else not both
+
+    if selection.startswith("AH "):
+        _, side, line = selection.split()
+        margin = (diff if side == "Home" else -diff) + float(line)
+        return None if margin == 0 else margin > 0
+
+    if selection.startswith("DNB "):
+        if diff == 0:
+            return None
+        return diff > 0 if selection.endswith("Home") else diff < 0
+
+    if selection.startswith("Correct Score "):
+        return selection.split()[-1] == f"{home_goals}-{away_goals}"
+
+    raise ValueError(f"unknown selection: {selection}")
+
+
+def iter_prices(event: Dict) -> Iterator[Tuple[str, str, float]]:
+    """(bookmaker, selection, price) for every priced outcome of an Odds API event.
+
+    1X2 outcomes are named "1", "X" and "2"; totals and spreads use their
+    SELECTIONS names. Outcomes we do not price are skipped.
+    """
+    home, away = event.get("home_team"), event.get("away_team")
+
+    # h2h outcomes are named after the teams, plus "Draw"
+    sides = {home: "Home", "Home": "Home", away: "Away", "Away": "Away"}
+    h2h = {home: "1", "Home": "1", "Draw": "X", away: "2", "Away": "2"}
+
+    for bookmaker in event.get("bookmakers", []):
+        for market in bookmaker.get("markets", []):
+            key = market.get("key")
+
+            for outcome in market.get("outcomes", []):
+                name, point = outcome.get("name"), outcome.get("point")
+
+                if key == "h2h":
+                    selection = h2h.get(name)
+                elif key == "totals" and point is not None:
+                    selection = f"{name} {point:g}"
+                elif key == "spreads" and point is not None and name in sides:
+                    selection = f"AH {sides[name]} {format_line(point)}"
+                else:
+                    selection = None
+
+                if selection and (selection in ("1", "X", "2") or selection in SELECTION_INDEX):
+                    yield bookmaker.get("key", ""), selection, outcome["price"]
+
+
+def parse_event(event: Dict) -> Dict[str, float]:
+    """Best price per selection across bookmakers for one Odds API event."""
+    best = {"1": 0, "X": 0, "2": 0}
+    for _, selection, odds in iter_prices(event):
+        best[selection] = max(best.get(selection, 0), odds)
+    return best
+
+
+class MatrixCache:
+    """LRU of scoreline matrices keyed by (fixture, home rating, away rating)."""
+
+    def __init__(self, max_entries: int = MATRIX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Sequence[Tuple[Hashable, float, float]]) -> np.ndarray:
+        """Matrices for keys, shape (N, G+1, G+1); misses are built in one batch."""
+        with self._lock:
+            found = {key: self._entries.get(key) for key in keys}
+            missing = [key for key in dict.fromkeys(keys) if found[key] is None]
+
+        if missing:
+            built = model.scoreline_matrices(*model.expected_goals(
+                [key[1] for key in missing], [key[2] for key in missing]
+            ))
+            found.update(zip(missing, built))
+
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            for key in keys:
+                self._entries[key] = found[key]
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        size = model.MAX_GOALS + 1
+        if not keys:
+            return np.zeros((0, size, size))
+        return np.stack([found[key] for key in keys])
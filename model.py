@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Scoreline Probability Engine
+=============================================
+Vectorized Poisson model: one home x away scoreline matrix per fixture,
+built for a whole batch of fixtures at once, with 1X2 probabilities
+read off each matrix.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# Goals per side covered by the matrix (0..MAX_GOALS); the tail beyond is
+# renormalized away
+MAX_GOALS = 10
+
+# Rating assumed for clubs we know nothing about
+DEFAULT_RATING = 70
+
+
+def expected_goals(home_ratings, away_ratings) -> Tuple[np.ndarray, np.ndarray]:
+    """Expected goals for each side from team ratings (arrays of length N)."""
+    home = np.asarray(home_ratings, dtype=float) / DEFAULT_RATING
+    away = np.asarray(away_ratings, dtype=float) / DEFAULT_RATING
+
+    home_xg = np.maximum(0.0, home * 1.5 - away * 0.5)
+    away_xg = np.maximum(0.0, away * 1.2 - home * 0.3)
+    return home_xg, away_xg
+
+
+def poisson_pmf(rates, max_goals: int = MAX_GOALS) -> np.ndarray:
+    """P(k goals) for k = 0..max_goals, shape (N, max_goals + 1)."""
+    rates = np.asarray(rates, dtype=float).reshape(-1, 1)
+    k = np.arange(1, max_goals + 1, dtype=float)
+
+    # pmf[k] = pmf[k-1] * rate / k, starting from exp(-rate)
+    pmf = np.empty((rates.shape[0], max_goals + 1))
+    pmf[:, 0] = np.exp(-rates[:, 0])
+    pmf[:, 1:] = pmf[:, :1] * np.cumprod(rates / k, axis=1)
+    return pmf
+
+
+def scoreline_matrices(home_xg, away_xg, max_goals: int = MAX_GOALS) -> np.ndarray:
+    """Independent-Poisson scoreline matrices, shape (N, home goals, away goals).
+
+    Each matrix is normalized to sum to 1 over the truncated grid.
+    """
+    matrices = poisson_pmf(home_xg, max_goals)[:, :, None] * poisson_pmf(away_xg, max_goals)[:, None, :]
+    return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+
+
+def outcome_probabilities(matrices: np.ndarray) -> np.ndarray:
+    """Home / draw / away probabilities per matrix, shape (N, 3)."""
+    size = matrices.shape[-1]
+    home_win = np.tril(np.ones((size, size), dtype=bool), k=-1)   # home goals > away goals
+
+    home = matrices[:, home_win].sum(axis=1)
+    draw = np.trace(matrices, axis1=1, axis2=2)
+    away = matrices[:, home_win.T].sum(axis=1)
+    return np.stack([home, draw, away], axis=1)
+
+
+def price_fixtures(home_ratings, away_ratings) -> np.ndarray:
+    """1X2 probabilities in percent for a batch of fixtures, shape (N, 3)."""
+    if len(home_ratings) == 0:
+        return np.zeros((0, 3))
+
+    home_xg, away_xg = expected_goals(home_ratings, away_ratings)
+    return outcome_probabilities(scoreline_matrices(home_xg, away_xg)) * 100
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Odds Snapshot Store
+====================================
+Keeps every price change we see from The Odds API, per (event,
+bookmaker, selection). A poll only writes the prices that moved since
+the previous one, stored as integers (decimal odds x 1000) against
+small integer ids for bookmakers and selections, so polling every few
+minutes stays cheap. Line movement and opening/closing prices are
+read straight off the primary key.
+
+Usage:
+  python3 odds_history.py stats
+"""
+
+import calendar
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import db
+import markets
+import teamnames
+
+# Prices are stored as integer thousandths of decimal odds
+PRICE_SCALE = 1000
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS odds_events (
+        id INTEGER PRIMARY KEY,
+        event_key TEXT NOT NULL UNIQUE,
+        home_team TEXT,
+        away_team TEXT,
+        home_key TEXT,
+        away_key TEXT,
+        commence_ts INTEGER
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_odds_events_fixture ON odds_events (home_key, away_key, commence_ts)",
+    '''
+    CREATE TABLE IF NOT EXISTS odds_bookmakers (
+        id INTEGER PRIMARY KEY,
+        key TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS odds_selections (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    ''',
+    # One row per price change
+    '''
+    CREATE TABLE IF NOT EXISTS odds_snapshots (
+        event_id INTEGER NOT NULL,
+        bookmaker_id INTEGER NOT NULL,
+        selection_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        price INTEGER NOT NULL,
+        PRIMARY KEY (event_id, bookmaker_id, selection_id, ts)
+    ) WITHOUT ROWID
+    ''',
+    # Last stored price per series, so a poll can skip unchanged prices
+    '''
+    CREATE TABLE IF NOT EXISTS odds_latest (
+        event_id INTEGER NOT NULL,
+        bookmaker_id INTEGER NOT NULL,
+        selection_id INTEGER NOT NULL,
+        ts INTEGER NOT NULL,
+        price INTEGER NOT NULL,
+        PRIMARY KEY (event_id, bookmaker_id, selection_id)
+    ) WITHOUT ROWID
+    ''',
+]
+
+
+def install(conn: sqlite3.Connection):
+    """Create the snapshot tables."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def encode(price: float) -> int:
+    """Decimal odds -> stored integer."""
+    return int(round(price * PRICE_SCALE))
+
+
+def decode(value: int) -> float:
+    """Stored integer -> decimal odds."""
+    return value / PRICE_SCALE
+
+
+def _ids(conn: sqlite3.Connection, table: str, column: str, values: List[str]) -> Dict[str, int]:
+    """Id per value in a dictionary table, inserting new values."""
+    conn.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", [(v,) for v in values])
+    ids = {}
+    for value in values:
+        ids[value] = conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()[0]
+    return ids
+
+
+def record(conn: sqlite3.Connection, events: List[Dict], ts: Optional[int] = None) -> Dict:
+    """Store the prices in an Odds API payload that changed since the last poll."""
+    ts = int(ts or time.time())
+    written = seen = 0
+
+    for event in events:
+        key = event.get("id") or f"{event.get('home_team')}|{event.get('away_team')}|{event.get('commence_time')}"
+        home, away = event.get("home_team"), event.get("away_team")
+        kickoff = teamnames.parse_kickoff(event.get("commence_time"))
+
+        conn.execute('''
+            INSERT INTO odds_events (event_key, home_team, away_team, home_key, away_key, commence_ts)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (event_key) DO UPDATE SET commence_ts = excluded.commence_ts
+        ''', (key, home, away, teamnames.team_key(home or ""), teamnames.team_key(away or ""),
+              _epoch(kickoff) if kickoff else None))
+        event_id = conn.execute("SELECT id FROM odds_events WHERE event_key = ?", (key,)).fetchone()[0]
+
+        prices = list(markets.iter_prices(event))
+        seen += len(prices)
+        if not prices:
+            continue
+
+        bookmakers = _ids(conn, "odds_bookmakers", "key", sorted({p[0] for p in prices}))
+        selections = _ids(conn, "odds_selections", "name", sorted({p[1] for p in prices}))
+        latest = {
+            (row[0], row[1]): row[2] for row in conn.execute(
+                "SELECT bookmaker_id, selection_id, price FROM odds_latest WHERE event_id = ?", (event_id,)
+            )
+        }
+
+        changes = []
+        for bookmaker, selection, price in prices:
+            series = (bookmakers[bookmaker], selections[selection])
+            value = encode(price)
+            if latest.get(series) != value:
+                latest[series] = value
+                changes.append((event_id, *series, ts, value))
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO odds_snapshots (event_id, bookmaker_id, selection_id, ts, price) VALUES (?, ?, ?, ?, ?)",
+            changes
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO odds_latest (event_id, bookmaker_id, selection_id, ts, price) VALUES (?, ?, ?, ?, ?)",
+            changes
+        )
+        written += len(changes)
+
+    return {"events": len(events), "prices": seen, "changes": written}
+
+
+def _epoch(when: datetime) -> int:
+    """Naive UTC datetime -> unix seconds."""
+    return calendar.timegm(when.timetuple())
+
+
+def find_event(home: str, away: str, date: Optional[str] = None) -> Optional[Dict]:
+    """The stored event for a fixture, nearest to date when given."""
+    rows = db.query('''
+        SELECT id, event_key, home_team, away_team, commence_ts FROM odds_events
+        WHERE home_key = ? AND away_key = ?
+        ORDER BY commence_ts DESC
+    ''', (teamnames.team_key(home), teamnames.team_key(away)))
+    if not rows:
+        return None
+
+    kickoff = teamnames.parse_kickoff(date)
+    if kickoff is not None:
+        target = _epoch(kickoff)
+        rows = sorted(rows, key=lambda r: abs((r[4] or 0) - target))
+
+    row = rows[0]
+    return {"id": row[0], "event_key": row[1], "home_team": row[2], "away_team": row[3], "commence_ts": row[4]}
+
+
+def movement(event_id: int, selection: Optional[str] = None, bookmaker: Optional[str] = None) -> List[Dict]:
+    """Every stored price change for an event, oldest first."""
+    sql = '''
+        SELECT b.key, s.name, o.ts, o.price
+        FROM odds_snapshots o
+        JOIN odds_bookmakers b ON b.id = o.bookmaker_id
+        JOIN odds_selections s ON s.id = o.selection_id
+        WHERE o.event_id = ?
+    '''
+    params = [event_id]
+    if selection:
+        sql += " AND s.name = ?"
+        params.append(selection)
+    if bookmaker:
+        sql += " AND b.key = ?"
+        params.append(bookmaker)
+
+    return [
+        {"bookmaker": row[0], "selection": row[1], "ts": row[2], "price": decode(row[3])}
+        for row in db.query(sql + " ORDER BY o.ts, b.key, s.name", params)
+    ]
+
+
+def opening_closing(event_id: int) -> List[Dict]:
+    """Opening and closing (last before kickoff) price per bookmaker and selection."""
+    rows = db.query('''
+        SELECT b.key, s.name,
+               (SELECT price FROM odds_snapshots o
+                WHERE o.event_id = l.event_id AND o.bookmaker_id = l.bookmaker_id AND o.selection_id = l.selection_id
+                ORDER BY o.ts ASC LIMIT 1),
+               (SELECT price FROM odds_snapshots o
+                WHERE o.event_id = l.event_id AND o.bookmaker_id = l.bookmaker_id AND o.selection_id = l.selection_id
+                  AND o.ts <= COALESCE(e.commence_ts, o.ts)
+                ORDER BY o.ts DESC LIMIT 1)
+        FROM odds_latest l
+        JOIN odds_events e ON e.id = l.event_id
+        JOIN odds_bookmakers b ON b.id = l.bookmaker_id
+        JOIN odds_selections s ON s.id = l.selection_id
+        WHERE l.event_id = ?
+        ORDER BY s.name, b.key
+    ''', (event_id,))
+
+    return [{
+        "bookmaker": row[0],
+        "selection": row[1],
+        "opening": decode(row[2]),
+        "closing": decode(row[3]) if row[3] is not None else None,
+        "move_pct": round((row[3] / row[2] - 1) * 100, 2) if row[3] is not None else None
+    } for row in rows]
+
+
+def stats() -> Dict:
+    """Row counts for the snapshot store."""
+    return {
+        table: db.query_one(f"SELECT COUNT(*) FROM {table}")[0]
+        for table in ("odds_events", "odds_bookmakers", "odds_selections", "odds_snapshots")
+    }
+
+
+def main():
+    """Command-line entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        print(stats())
+    else:
+        print("Usage:")
+        print("  python3 odds_history.py stats    # Row counts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Staking Parameter Optimizer
+============================================
+Grid or random search over kelly_fraction, max_kelly_pct, min_edge and
+the confidence multipliers, scored by compounded bankroll growth on
+settled tips (or backtest history). The dataset is placed in shared
+memory once and every pool worker maps it read-only, so thousands of
+candidates cost no per-worker copies.
+
+Candidates are ranked on the older part of the data (train) and
+re-scored on the most recent part (test) for out-of-sample validation.
+
+Usage:
+  python3 optimizer.py [--source tips|history] [--samples N] [--top N] [--save]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import backtest
+import db
+import staking
+import stream
+
+# Candidate columns, in order
+PARAMS = ["kelly_fraction", "max_kelly_pct", "min_edge", "conf_high", "conf_medium", "conf_low"]
+
+# Values searched per parameter
+GRID = {
+    "kelly_fraction": [0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.5],
+    "max_kelly_pct": [0.02, 0.035, 0.05, 0.075, 0.1],
+    "min_edge": [5, 8, 10, 12, 15, 20, 25],
+    "conf_high": [1.0],
+    "conf_medium": [0.5, 0.7, 0.85, 1.0],
+    "conf_low": [0.2, 0.4, 0.6, 0.8],
+}
+
+# Bounds for random search
+RANGES = {
+    "kelly_fraction": (0.05, 0.6),
+    "max_kelly_pct": (0.01, 0.12),
+    "min_edge": (0, 30),
+    "conf_high": (0.6, 1.0),
+    "conf_medium": (0.3, 1.0),
+    "conf_low": (0.0, 0.8),
+}
+
+TRAIN_SHARE = 0.7            # oldest share of matchdays used for ranking
+MIN_BETS = 30                # candidates betting less than this on train are not ranked
+MAX_CELLS = 2_000_000        # candidates x bets evaluated per numpy batch
+
+# Dataset arrays, as mapped inside a worker
+_shared: Dict[str, np.ndarray] = {}
+_blocks: List[shared_memory.SharedMemory] = []
+
+
+def load_tips() -> Dict[str, np.ndarray]:
+    """Settled tips in date order.
+
+    Tips store the chosen price and edge, so the model probability is
+    recovered from them. Only tips that cleared min_edge when they were
+    issued exist, so lower min_edge values add nothing here.
+    """
+    rows = db.query('''
+        SELECT date, odds, edge, win FROM tips
+        WHERE status = 'resulted' AND odds > 1 AND win IS NOT NULL
+        ORDER BY date, id
+    ''')
+
+    odds = np.array([r[1] for r in rows], dtype=float)
+    edge = np.array([r[2] for r in rows], dtype=float)
+    return _dataset(
+        [r[0] for r in rows], odds, edge,
+        prob=(1 + edge / 100) / odds * 100,
+        won=np.array([r[3] for r in rows], dtype=bool)
+    )
+
+
+def load_history() -> Dict[str, np.ndarray]:
+    """Best-edge outcome of every stored historical fixture, in date order.
+
+    Fixtures are priced from ratings rebuilt up to their matchday (see
+    backtest.price_segment), not today's ratings.
+    """
+    dates, probs, odds, results = [], [], [], []
+
+    for league, season in backtest.segments():
+        data = backtest.load_segment(league, season)
+        dates.extend(data["date"].tolist())
+        probs.append(backtest.price_segment(league, data))
+        odds.append(data["odds"])
+        results.append(data["result"])
+
+    if not dates:
+        return _dataset([], np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool))
+
+    best = staking.evaluate(np.concatenate(probs), np.concatenate(odds),
+                            min_edge=-np.inf, kelly_fraction=1, max_kelly_pct=np.inf)
+    order = np.argsort(np.array(dates), kind="stable")
+
+    return _dataset(
+        np.array(dates)[order].tolist(), best["odds"][order], best["edge"][order],
+        prob=best["prob"][order],
+        won=(best["outcome"] == np.concatenate(results))[order]
+    )
+
+
+def _dataset(dates: List[str], odds: np.ndarray, edge: np.ndarray,
+             prob: np.ndarray, won: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-bet arrays plus matchday grouping and the fixed per-bet terms."""
+    days, day = np.unique(np.array(dates, dtype=str), return_inverse=True)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        full_kelly = ((odds - 1) * (prob / 100) - (1 - prob / 100)) / (odds - 1)
+
+    confidence = np.where(
+        (edge >= 25) & (prob >= 60), 2,
+        np.where((edge >= 15) | (prob >= 50), 1, 0)
+    )
+
+    return {
+        "day": day.astype(np.int32),
+        "edge": edge.astype(float),
+        "full_kelly": np.nan_to_num(full_kelly).astype(float),
+        "confidence": confidence.astype(np.int8),
+        "returns": np.where(won, odds - 1, -1.0).astype(float),
+        "won": won.astype(bool),
+        "days": days
+    }
+
+
+def grid() -> np.ndarray:
+    """Every GRID combination, shape (C, len(PARAMS))."""
+    return np.array(list(itertools.product(*(GRID[p] for p in PARAMS))), dtype=float)
+
+
+def random_candidates(n: int, seed: int = 7) -> np.ndarray:
+    """n uniform samples inside RANGES, shape (n, len(PARAMS))."""
+    rng = np.random.default_rng(seed)
+    low = np.array([RANGES[p][0] for p in PARAMS])
+    high = np.array([RANGES[p][1] for p in PARAMS])
+    return rng.uniform(low, high, size=(n, len(PARAMS)))
+
+
+def score(data: Dict[str, np.ndarray], candidates: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """Metrics for each candidate on bets lo:hi, compounding per matchday.
+
+    Returns (C, 5): log growth, ROI %, max drawdown %, bets, hit rate %.
+    """
+    edge = data["edge"][lo:hi]
+    full_kelly = data["full_kelly"][lo:hi]
+    confidence = data["confidence"][lo:hi]
+    returns = data["returns"][lo:hi]
+    won = data["won"][lo:hi]
+    day = data["day"][lo:hi]
+
+    if hi <= lo:
+        return np.zeros((len(candidates), 5))
+
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    out = np.empty((len(candidates), 5))
+    batch = max(1, MAX_CELLS // (hi - lo))
+
+    for first in range(0, len(candidates), batch):
+        c = candidates[first:first + batch]
+        multipliers = c[:, [5, 4, 3]][:, confidence]               # LOW, MEDIUM, HIGH by tier
+
+        fraction = full_kelly * c[:, :1] * multipliers
+        fraction = np.clip(fraction, 0, c[:, 1:2])
+        fraction *= edge >= c[:, 2:3]
+
+        # Bankroll multiplier per matchday, then the compounded curve
+        day_fraction = np.add.reduceat(fraction, starts, axis=1)
+        day_return = np.add.reduceat(fraction * returns, starts, axis=1)
+        log_curve = np.cumsum(np.log(np.maximum(1 + day_return, 1e-9)), axis=1)
+
+        before = np.exp(np.hstack([np.zeros((len(c), 1)), log_curve[:, :-1]]))
+        staked = (before * day_fraction).sum(axis=1)
+        profit = np.exp(log_curve[:, -1]) - 1
+
+        peaks = np.maximum.accumulate(np.maximum(log_curve, 0), axis=1)
+        drawdown = 1 - np.exp(log_curve - peaks)
+
+        placed = fraction > 0
+        bets = placed.sum(axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[first:first + len(c)] = np.column_stack([
+                log_curve[:, -1],
+                np.where(staked > 0, profit / staked * 100, 0),
+                drawdown.max(axis=1) * 100,
+                bets,
+                np.where(bets > 0, (placed & won).sum(axis=1) / bets * 100, 0)
+            ])
+
+    return out
+
+
+def _share(data: Dict[str, np.ndarray]) -> Dict[str, tuple]:
+    """Copy the numeric arrays into shared memory; returns worker specs."""
+    specs = {}
+    for name, array in data.items():
+        if array.dtype.kind not in "biuf":
+            continue
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        _blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return specs
+
+
+def _attach(specs: Dict[str, tuple]):
+    """Pool initializer: map the shared arrays read-only."""
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype, buffer=block.buf)
+        array.flags.writeable = False
+        _blocks.append(block)
+        _shared[name] = array
+
+
+def _score_chunk(task: tuple) -> tuple:
+    """Score a chunk of candidates on train and test. Runs inside a pool worker."""
+    candidates, split, total = task
+    return score(_shared, candidates, 0, split), score(_shared, candidates, split, total)
+
+
+def _release():
+    while _blocks:
+        block = _blocks.pop()
+        block.close()
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def optimize(data: Dict[str, np.ndarray], candidates: np.ndarray, top: int = 20,
+             workers: Optional[int] = None) -> Dict:
+    """Rank candidates by train log growth and validate the top ones on test."""
+    total = len(data["day"])
+    split_day = int(len(data["days"]) * TRAIN_SHARE)
+    split = int(np.searchsorted(data["day"], split_day))
+
+    workers = workers or os.cpu_count() or 1
+    chunks = np.array_split(candidates, max(1, min(len(candidates), workers * 4)))
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [(score(data, c, 0, split), score(data, c, split, total)) for c in chunks]
+    else:
+        try:
+            specs = _share(data)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+                results = list(pool.map(_score_chunk, [(c, split, total) for c in chunks]))
+        finally:
+            _release()
+
+    train = np.vstack([r[0] for r in results])
+    test = np.vstack([r[1] for r in results])
+
+    eligible = np.flatnonzero(train[:, 3] >= MIN_BETS)
+    order = eligible[np.argsort(-train[eligible, 0], kind="stable")][:top]
+
+    def metrics(row):
+        return {
+            "growth_pct": round(float(np.expm1(row[0])) * 100, 2),
+            "roi_pct": round(float(row[1]), 2),
+            "max_drawdown_pct": round(float(row[2]), 2),
+            "bets": int(row[3]),
+            "hit_rate": round(float(row[4]), 2)
+        }
+
+    ranked = [{
+        "rank": rank + 1,
+        "params": to_settings(candidates[i]),
+        "train": metrics(train[i]),
+        "test": metrics(test[i])
+    } for rank, i in enumerate(order)]
+
+    return {
+        "candidates": len(candidates),
+        "bets": total,
+        "train_bets": split,
+        "test_bets": total - split,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "ranked": ranked
+    }
+
+
+def to_settings(candidate) -> Dict:
+    """Candidate row as settings keys."""
+    values = dict(zip(PARAMS, (float(v) for v in candidate)))
+    return {
+        "kelly_fraction": round(values["kelly_fraction"], 4),
+        "max_kelly_pct": round(values["max_kelly_pct"], 4),
+        "min_edge": round(values["min_edge"], 2),
+        "conf_mult": {
+            "HIGH": round(values["conf_high"], 3),
+            "MEDIUM": round(values["conf_medium"], 3),
+            "LOW": round(values["conf_low"], 3)
+        }
+    }
+
+
+def save(params: Dict) -> Dict:
+    """Validate and store a parameter set, like POST /api/settings; ValueError if out of bounds."""
+    from app import SETTINGS
+
+    stored = SETTINGS.update(params)
+    stream.publish("settings", stored)
+    return stored
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Search staking parameters against settled bets")
+    parser.add_argument("--source", choices=["tips", "history"], default="tips")
+    parser.add_argument("--samples", type=int, help="Random candidates instead of the full grid")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--save", action="store_true", help="Write the best set to settings")
+    args = parser.parse_args()
+
+    from app import BettingApp
+    BettingApp()
+
+    if args.source == "history":
+        data = load_history()
+    else:
+        data = load_tips()
+
+    if len(data["day"]) < MIN_BETS:
+        print(f"❌ Only {len(data['day'])} settled bets; need at least {MIN_BETS}")
+        sys.exit(1)
+
+    candidates = random_candidates(args.samples) if args.samples else grid()
+    report = optimize(data, candidates, args.top, args.workers)
+
+    print(f"📊 {report['candidates']} candidates x {report['bets']} bets "
+          f"(train {report['train_bets']} / test {report['test_bets']}) in {report['elapsed_ms']}ms\n")
+    print(f"{'#':>3} {'kelly':>6} {'max':>6} {'edge':>6} {'H/M/L':>15} "
+          f"{'train':>9} {'test':>9} {'test ROI':>9} {'test DD':>8} {'bets':>5}")
+
+    for row in report["ranked"]:
+        p, train, test = row["params"], row["train"], row["test"]
+        mult = "/".join(f"{p['conf_mult'][k]:.2f}" for k in ("HIGH", "MEDIUM", "LOW"))
+        print(f"{row['rank']:>3} {p['kelly_fraction']:>6.3f} {p['max_kelly_pct']:>6.3f} {p['min_edge']:>6.1f} "
+              f"{mult:>15} {train['growth_pct']:>+8.1f}% {test['growth_pct']:>+8.1f}% "
+              f"{test['roi_pct']:>+8.1f}% {test['max_drawdown_pct']:>7.1f}% {test['bets']:>5}")
+
+    if args.save and report["ranked"]:
+        try:
+            stored = save(report["ranked"][0]["params"])
+        except ValueError as e:
+            print(f"\n❌ Best parameters not saved: {e}")
+            sys.exit(1)
+        print(f"\n✅ Saved best parameters to settings: {stored}")
+
+
+if __name__ == "__main__":
+    main()
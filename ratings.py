@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Team Rating Engine
+===================================
+Elo ratings kept in the teams table, on the same scale the scoreline
+model reads (DEFAULT_RATING for an average side). Every finished match
+moves both clubs' ratings once, in O(1): two indexed reads and two
+updates. Clubs first seen in a feed are added at DEFAULT_RATING, and
+the hand-tuned ratings below only seed an empty table.
+"""
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+import db
+import model
+import teamnames
+
+K_FACTOR = 1.5           # rating points moved by a one-goal upset of equals
+SCALE = 25.0             # rating gap at which the stronger side expects 10:1
+HOME_EDGE = 3.0          # rating points added to the home side's expectation
+FORM_LENGTH = 5
+
+# Starting ratings for clubs we had hand-tuned before the engine existed
+SEED_TEAMS = {
+    # Premier League
+    "Manchester City": {"rating": 96, "form": "WWWWW", "home_adv": 9},
+    "Liverpool": {"rating": 94, "form": "WLWWW", "home_adv": 8},
+    "Arsenal": {"rating": 92, "form": "WWLDW", "home_adv": 8},
+    "Aston Villa": {"rating": 85, "form": "WWLWW", "home_adv": 7},
+    "Tottenham": {"rating": 86, "form": "LWWLW", "home_adv": 7},
+    "Chelsea": {"rating": 87, "form": "WLWLD", "home_adv": 7},
+    "Manchester United": {"rating": 84, "form": "LDLWL", "home_adv": 6},
+    "Newcastle": {"rating": 84, "form": "WWLWL", "home_adv": 6},
+
+    # Bundesliga
+    "Bayern Munich": {"rating": 97, "form": "WWWWW", "home_adv": 9},
+    "Dortmund": {"rating": 90, "form": "WWLWW", "home_adv": 8},
+    "Leverkusen": {"rating": 89, "form": "WWWWD", "home_adv": 8},
+    "RB Leipzig": {"rating": 87, "form": "WLWWW", "home_adv": 7},
+
+    # Serie A
+    "Inter Milan": {"rating": 93, "form": "WWWWW", "home_adv": 8},
+    "Juventus": {"rating": 89, "form": "WWLWD", "home_adv": 8},
+    "AC Milan": {"rating": 88, "form": "WLWWL", "home_adv": 7},
+    "Napoli": {"rating": 86, "form": "LWLLW", "home_adv": 7},
+
+    # La Liga
+    "Real Madrid": {"rating": 96, "form": "WWWWW", "home_adv": 9},
+    "Barcelona": {"rating": 92, "form": "WLWWW", "home_adv": 8},
+    "Atletico Madrid": {"rating": 88, "form": "WWLDL", "home_adv": 7},
+    "Girona": {"rating": 84, "form": "LWWWW", "home_adv": 7},
+
+    # Ligue 1
+    "PSG": {"rating": 93, "form": "WWWDW", "home_adv": 8},
+    "Monaco": {"rating": 85, "form": "LWWWW", "home_adv": 7},
+    "Lille": {"rating": 83, "form": "WLDWW", "home_adv": 6},
+
+    # Eredivisie
+    "PSV Eindhoven": {"rating": 88, "form": "WWWWW", "home_adv": 8},
+    "Ajax": {"rating": 87, "form": "LWWWW", "home_adv": 8},
+    "Feyenoord": {"rating": 86, "form": "WWLDW", "home_adv": 7},
+
+    # Primeira Liga
+    "Porto": {"rating": 88, "form": "WWWWW", "home_adv": 8},
+    "Benfica": {"rating": 87, "form": "WLWWW", "home_adv": 8},
+    "Sporting CP": {"rating": 86, "form": "WWLWD", "home_adv": 7},
+
+    # Championship
+    "Leicester City": {"rating": 82, "form": "WWWWW", "home_adv": 6},
+    "Leeds United": {"rating": 80, "form": "WLWWW", "home_adv": 6},
+    "Southampton": {"rating": 79, "form": "WWLWL", "home_adv": 6},
+}
+
+
+# Columns added to the original teams table
+COLUMNS = [
+    ("team_key", "TEXT"),
+    ("matches", "INTEGER NOT NULL DEFAULT 0"),
+    ("updated_at", "TEXT"),
+]
+
+SCHEMA = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_teams_key ON teams (team_key)",
+    # Finished matches already applied, so re-fetched results count once
+    '''
+    CREATE TABLE IF NOT EXISTS rated_matches (
+        fixture TEXT PRIMARY KEY,
+        rated_at TEXT NOT NULL
+    ) WITHOUT ROWID
+    ''',
+]
+
+
+def install(conn: sqlite3.Connection):
+    """Extend the teams table, index it by team key and seed it when empty."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(teams)")}
+    for column, definition in COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE teams ADD COLUMN {column} {definition}")
+
+    # Rows from before team keys existed
+    for team_id, name in conn.execute("SELECT id, name FROM teams WHERE team_key IS NULL").fetchall():
+        conn.execute("UPDATE OR IGNORE teams SET team_key = ? WHERE id = ?", (teamnames.team_key(name), team_id))
+
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+    if conn.execute("SELECT COUNT(*) FROM teams").fetchone()[0] == 0:
+        conn.executemany(
+            "INSERT OR IGNORE INTO teams (name, team_key, rating, form, home_advantage) VALUES (?, ?, ?, ?, ?)",
+            [(name, teamnames.team_key(name), info["rating"], info["form"], info["home_adv"])
+             for name, info in SEED_TEAMS.items()]
+        )
+
+
+# Bumped on any teams write, so every worker can tell its ratings are stale
+VERSION_SCHEMA = [
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('teams_version', 1)",
+] + [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS teams_revision_{event.lower()}
+    AFTER {event} ON teams
+    BEGIN
+        UPDATE meta SET value = value + 1 WHERE key = 'teams_version';
+    END
+    '''
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+def install_version(conn: sqlite3.Connection):
+    """Create the teams version and its triggers; needs the meta table."""
+    for statement in VERSION_SCHEMA:
+        conn.execute(statement)
+
+
+def version() -> int:
+    """Current teams version, bumped on every teams write."""
+    row = db.query_one("SELECT value FROM meta WHERE key = 'teams_version'")
+    return row[0] if row else 0
+
+
+def load() -> Dict[str, Dict]:
+    """All clubs as {name: {rating, form, home_adv}}, the shape BettingApp.teams uses."""
+    return {
+        name: {"rating": round(rating, 1), "form": form or "", "home_adv": home_adv}
+        for name, rating, form, home_adv in db.query(
+            "SELECT name, rating, form, home_advantage FROM teams ORDER BY rating DESC"
+        )
+    }
+
+
+def ensure(conn: sqlite3.Connection, names: Iterable[str]) -> int:
+    """Add clubs not seen before at DEFAULT_RATING. Returns how many were new."""
+    before = conn.total_changes
+    conn.executemany(
+        "INSERT OR IGNORE INTO teams (name, team_key, rating, form, matches) VALUES (?, ?, ?, '', 0)",
+        [(name, teamnames.team_key(name), model.DEFAULT_RATING) for name in names]
+    )
+    return conn.total_changes - before
+
+
+def expected_home(home_rating: float, away_rating: float) -> float:
+    """Home side's expected score (win = 1, draw = 0.5)."""
+    return 1 / (1 + 10 ** ((away_rating - home_rating - HOME_EDGE) / SCALE))
+
+
+def margin_multiplier(goal_difference: int) -> float:
+    """World Football Elo weighting for the winning margin."""
+    goal_difference = abs(goal_difference)
+    if goal_difference <= 1:
+        return 1.0
+    if goal_difference == 2:
+        return 1.5
+    return (11 + goal_difference) / 8
+
+
+def rating_change(home_rating: float, away_rating: float, home_goals: int, away_goals: int) -> float:
+    """Points the home side gains (and the away side loses) for one result."""
+    actual = 1.0 if home_goals > away_goals else 0.0 if home_goals < away_goals else 0.5
+    return K_FACTOR * margin_multiplier(home_goals - away_goals) * (actual - expected_home(home_rating, away_rating))
+
+
+def apply_result(conn: sqlite3.Connection, home: str, away: str, home_goals: int,
+                 away_goals: int, date: str) -> bool:
+    """Move both clubs' ratings for one finished match. False if already applied."""
+    home_key, away_key = teamnames.team_key(home), teamnames.team_key(away)
+
+    claimed = conn.execute(
+        "INSERT OR IGNORE INTO rated_matches (fixture, rated_at) VALUES (?, ?)",
+        (f"{date[:10]}|{home_key}|{away_key}", datetime.now().isoformat())
+    )
+    if claimed.rowcount == 0:
+        return False
+
+    ensure(conn, [home, away])
+    (home_rating, home_form), (away_rating, away_form) = [
+        conn.execute("SELECT rating, form FROM teams WHERE team_key = ?", (key,)).fetchone()
+        for key in (home_key, away_key)
+    ]
+
+    actual = 1.0 if home_goals > away_goals else 0.0 if home_goals < away_goals else 0.5
+    delta = rating_change(home_rating, away_rating, home_goals, away_goals)
+
+    letters = {1.0: ("W", "L"), 0.5: ("D", "D"), 0.0: ("L", "W")}[actual]
+    now = datetime.now().isoformat()
+
+    for key, rating, form, letter in ((home_key, home_rating + delta, home_form, letters[0]),
+                                      (away_key, away_rating - delta, away_form, letters[1])):
+        conn.execute(
+            "UPDATE teams SET rating = ?, form = ?, matches = matches + 1, updated_at = ? WHERE team_key = ?",
+            (round(rating, 3), (letter + (form or ""))[:FORM_LENGTH], now, key)
+        )
+    return True
+
+
+def apply_results(conn: sqlite3.Connection, results: Iterable[Tuple[str, str, int, int, str]]) -> int:
+    """Apply (home, away, home_goals, away_goals, date) results in order. Returns how many were new."""
+    return sum(apply_result(conn, *result) for result in results)
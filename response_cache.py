@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Versioned Response Cache
+=========================================
+Per-worker cache of serialized JSON responses, keyed by URL and the
+shared SQLite data version. Any write that bumps the version makes
+every worker recompute on its next request; unchanged data is served
+from memory, or as 304 Not Modified when the client's ETag matches.
+"""
+
+import threading
+import zlib
+from functools import wraps
+from typing import Callable, Dict, Tuple
+
+from flask import Response, request
+
+import db
+
+MAX_ENTRIES = 512
+
+
+class ResponseCache:
+    """URL -> (data version, body, etag, mimetype) for one worker."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[int, bytes, str, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, version: int):
+        """Return the entry for key if it was built at this version."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, version: int, body: bytes, mimetype: str):
+        """Store a response body built at version."""
+        etag = f'"{version}-{zlib.crc32(body):08x}"'
+        entry = (version, body, etag, mimetype)
+
+        with self._lock:
+            # Older versions are dead weight once a newer one is seen
+            if len(self._entries) >= self.max_entries:
+                self._entries = {k: v for k, v in self._entries.items() if v[0] >= version}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = entry
+
+        return entry
+
+    def clear(self):
+        """Drop every cached response."""
+        with self._lock:
+            self._entries = {}
+
+
+cache = ResponseCache()
+
+
+def versioned(view: Callable) -> Callable:
+    """Cache a JSON view under the data version and answer ETag revalidation."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = db.data_version()
+        key = request.full_path
+        entry = cache.get(key, version)
+
+        if entry is None:
+            result = view(*args, **kwargs)
+            response = result if isinstance(result, Response) else None
+
+            # Errors and (body, status) tuples are passed through uncached
+            if response is None or response.status_code != 200:
+                return result
+
+            entry = cache.put(key, version, response.get_data(), response.mimetype)
+
+        _, body, etag, mimetype = entry
+
+        if request.if_none_match.contains_raw(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype=mimetype)
+
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    return wrapper
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Monte Carlo Bankroll Risk
+==========================================
+Simulates future bankroll paths by drawing bets from our pending and
+settled tips (model probability, odds, Kelly stake) and settling each
+one at random. Paths run in vectorized batches sized so that memory
+stays bounded no matter how many paths are asked for. Reports final
+bankroll and drawdown percentiles, risk of ruin and chance of profit.
+
+Usage:
+  python3 risk.py [paths] [bets]
+"""
+
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+import db
+
+DEFAULT_PATHS = 100_000
+DEFAULT_BETS = 500
+MAX_PATHS = 1_000_000
+MAX_BETS = 5_000
+MAX_CELLS = 1_000_000        # paths x bets simulated per batch (~8 MB per array)
+MAX_REQUEST_CELLS = 50_000_000   # paths x bets per API request, the default run (~3 s)
+
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+# Calibration is clamped so a short losing run cannot zero every probability
+CALIBRATION_BOUNDS = (0.5, 1.5)
+
+
+def load_pool() -> Dict[str, np.ndarray]:
+    """Bets to draw from: every pending and settled tip with a stake.
+
+    The model probability is recovered from the stored edge and odds.
+    """
+    rows = db.query('''
+        SELECT odds, edge, kelly_pct, status, win FROM tips
+        WHERE status IN ('pending', 'resulted') AND odds > 1 AND kelly_pct > 0
+    ''')
+
+    odds = np.array([r[0] for r in rows], dtype=float)
+    edge = np.array([r[1] for r in rows], dtype=float)
+    settled = np.array([r[3] == 'resulted' and r[4] is not None for r in rows], dtype=bool)
+
+    return {
+        "odds": odds,
+        "prob": np.clip((1 + edge / 100) / odds, 0, 1),
+        "fraction": np.array([r[2] for r in rows], dtype=float) / 100,
+        "settled": settled,
+        "pending": np.array([r[3] == 'pending' for r in rows], dtype=bool),
+        "won": np.array([bool(r[4]) for r in rows], dtype=bool)
+    }
+
+
+def calibration(pool: Dict[str, np.ndarray]) -> float:
+    """Actual wins over model-expected wins on settled tips."""
+    settled = pool["settled"]
+    expected = pool["prob"][settled].sum()
+    if expected <= 0:
+        return 1.0
+
+    factor = pool["won"][settled].sum() / expected
+    return float(np.clip(factor, *CALIBRATION_BOUNDS))
+
+
+def simulate(pool: Dict[str, np.ndarray], paths: int = DEFAULT_PATHS, bets: int = DEFAULT_BETS,
+             stake_scale: float = 1.0, max_kelly_pct: Optional[float] = None,
+             ruin_pct: float = 50.0, calibrate: bool = True, seed: int = 7) -> Dict[str, np.ndarray]:
+    """Per-path final bankroll multiple, max drawdown and ruin flag.
+
+    Each path places `bets` bets in sequence, each drawn uniformly from
+    the pool and staked as its Kelly fraction of the current bankroll
+    (times stake_scale, capped at max_kelly_pct). A path is ruined once
+    it drops to ruin_pct % of its starting bankroll.
+    """
+    rng = np.random.default_rng(seed)
+    factor = calibration(pool) if calibrate else 1.0
+
+    prob = np.clip(pool["prob"] * factor, 0, 1)
+    fraction = pool["fraction"] * stake_scale
+    if max_kelly_pct is not None:
+        fraction = np.minimum(fraction, max_kelly_pct)
+    fraction = np.clip(fraction, 0, 1)
+
+    # Log bankroll change per bet, won or lost
+    log_win = np.log1p(fraction * (pool["odds"] - 1))
+    log_loss = np.log(np.maximum(1 - fraction, 1e-12))
+    ruin_level = np.log(ruin_pct / 100)
+
+    final = np.empty(paths)
+    drawdown = np.empty(paths)
+    ruined = np.empty(paths, dtype=bool)
+    batch = max(1, MAX_CELLS // bets)
+
+    for first in range(0, paths, batch):
+        n = min(batch, paths - first)
+        picks = rng.integers(0, len(prob), size=(n, bets))
+        won = rng.random((n, bets)) < prob[picks]
+
+        curve = np.cumsum(np.where(won, log_win[picks], log_loss[picks]), axis=1)
+        peaks = np.maximum(np.maximum.accumulate(curve, axis=1), 0)
+
+        final[first:first + n] = np.exp(curve[:, -1])
+        drawdown[first:first + n] = 1 - np.exp((curve - peaks).min(axis=1))
+        ruined[first:first + n] = curve.min(axis=1) <= ruin_level
+
+    return {"final": final, "drawdown": drawdown, "ruined": ruined, "calibration": factor}
+
+
+def report(paths: int = DEFAULT_PATHS, bets: int = DEFAULT_BETS, bankroll: float = 1000,
+           **options) -> Dict:
+    """Simulate from the current tips and summarize as percentiles."""
+    start = time.perf_counter()
+    pool = load_pool()
+
+    summary = {
+        "paths": paths,
+        "bets_per_path": bets,
+        "pool": {
+            "pending": int(pool["pending"].sum()),
+            "settled": int(pool["settled"].sum())
+        }
+    }
+    if len(pool["odds"]) == 0:
+        return {**summary, "error": "No staked tips to simulate"}
+
+    result = simulate(pool, paths, bets, **options)
+
+    summary.update({
+        "calibration": round(result["calibration"], 3),
+        "final_bankroll": {
+            f"p{p}": round(float(v) * bankroll, 2)
+            for p, v in zip(PERCENTILES, np.percentile(result["final"], PERCENTILES))
+        },
+        "max_drawdown_pct": {
+            f"p{p}": round(float(v) * 100, 2)
+            for p, v in zip(PERCENTILES, np.percentile(result["drawdown"], PERCENTILES))
+        },
+        "risk_of_ruin_pct": round(float(result["ruined"].mean()) * 100, 3),
+        "prob_profit_pct": round(float((result["final"] > 1).mean()) * 100, 2),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+    })
+    return summary
+
+
+def main():
+    """Command-line entry point."""
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATHS
+    bets = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BETS
+
+    from app import BettingApp, CONFIG
+    BettingApp()
+    print(report(paths, bets, CONFIG["bankroll"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Shared Settings
+================================
+The settings table is the source of truth for the user-editable parts
+of CONFIG (bankroll, staking parameters, confidence multipliers). Each
+process keeps them in CONFIG along with the settings version it loaded.
+Triggers bump that version on any settings write, so a worker compares
+one integer per request and reloads the table only after a change,
+whichever worker or script made it.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Dict
+
+import db
+
+# CONFIG keys stored in the settings table
+EDITABLE = ["bankroll", "kelly_fraction", "max_kelly_pct", "min_edge", "max_exposure_pct", "conf_mult"]
+
+# Accepted ranges, inclusive unless listed in EXCLUSIVE_LOW; fractions are of the bankroll
+BOUNDS = {
+    "bankroll": (0, None),
+    "kelly_fraction": (0, 1),
+    "max_kelly_pct": (0, 1),
+    "min_edge": (0, None),
+    "max_exposure_pct": (0, 1),
+}
+EXCLUSIVE_LOW = {"bankroll"}
+
+SCHEMA = [
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('settings_version', 1)",
+] + [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS settings_revision_{event.lower()}
+    AFTER {event} ON settings
+    BEGIN
+        UPDATE meta SET value = value + 1 WHERE key = 'settings_version';
+    END
+    '''
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+def install(conn: sqlite3.Connection):
+    """Create the settings version and its triggers; needs the meta table."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def version() -> int:
+    """Current settings version, bumped on every settings write."""
+    row = db.query_one("SELECT value FROM meta WHERE key = 'settings_version'")
+    return row[0] if row else 0
+
+
+def _number(key: str, value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{key} must be a number")
+
+    low, high = BOUNDS[key]
+    too_low = value <= low if key in EXCLUSIVE_LOW else value < low
+    if too_low or (high is not None and value > high):
+        if high is not None:
+            limit = f"between {low} and {high}"
+        else:
+            limit = f"above {low}" if key in EXCLUSIVE_LOW else f"at least {low}"
+        raise ValueError(f"{key} must be {limit}")
+    return value
+
+
+def validate(values: Dict, conf_mult: Dict) -> Dict:
+    """Checked copy of editable values; conf_mult is merged into the current one."""
+    if not isinstance(values, dict):
+        raise ValueError("settings must be a JSON object")
+
+    unknown = sorted(set(values) - set(EDITABLE))
+    if unknown:
+        raise ValueError(f"unknown settings: {', '.join(unknown)}")
+
+    checked = {}
+    for key, value in values.items():
+        if key == "conf_mult":
+            if not isinstance(value, dict):
+                raise ValueError("conf_mult must be an object")
+            merged = dict(conf_mult)
+            for level, mult in value.items():
+                if isinstance(mult, bool) or not isinstance(mult, (int, float)) or mult < 0:
+                    raise ValueError(f"conf_mult.{level} must be a non-negative number")
+                merged[level] = mult
+            checked[key] = merged
+        else:
+            checked[key] = _number(key, value)
+    return checked
+
+
+class SettingsStore:
+    """Keeps one CONFIG dict in step with the settings table."""
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.defaults = {key: config[key] for key in EDITABLE}
+        self.version = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Dict:
+        """Editable settings as this process sees them."""
+        return {key: self.config[key] for key in EDITABLE}
+
+    def refresh(self) -> bool:
+        """Reload from the table if another write moved the version; True if reloaded."""
+        current = version()
+        if current == self.version:
+            return False
+
+        with self._lock:
+            if current == self.version:
+                return False
+
+            # Rows written before validation existed may hold anything;
+            # a bad one falls back to its default instead of breaking requests
+            stored = {}
+            for key, value in db.query("SELECT key, value FROM settings"):
+                if key not in EDITABLE:
+                    continue
+                try:
+                    stored.update(validate({key: json.loads(value)}, self.defaults["conf_mult"]))
+                except (TypeError, ValueError) as e:
+                    print(f"Error reading setting {key}: {value!r} ({e})")
+
+            for key in EDITABLE:
+                default = self.defaults[key]
+                self.config[key] = stored.get(key, dict(default) if isinstance(default, dict) else default)
+
+            self.version = current
+        return True
+
+    def update(self, values: Dict) -> Dict:
+        """Validate, store and apply new values; returns what was stored."""
+        self.refresh()
+        checked = validate(values, self.config["conf_mult"])
+        if checked:
+            db.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                           [(key, json.dumps(value)) for key, value in checked.items()])
+        self.refresh()
+        return checked
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Batch Value-Bet Evaluator
+==========================================
+Edge, confidence tier and clipped Kelly stake for N matches x K
+outcomes in one vectorized pass, then the best outcome per match.
+Gives the same picks and numbers as the original per-match loop.
+
+Bets settling in the same window can then be re-sized jointly so their
+combined stake stays under an exposure cap (portfolio Kelly).
+
+Usage:
+  python3 staking.py bench [fixtures]    # Compare against the loop
+  python3 staking.py portfolio [bets]    # Time the portfolio solver
+"""
+
+import math
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+# Confidence tiers, indexed by the codes evaluate() returns
+CONFIDENCE_LEVELS = np.array(["LOW", "MEDIUM", "HIGH"])
+CONF_MULT = {"HIGH": 1.0, "MEDIUM": 0.7, "LOW": 0.4}
+
+OUTCOMES = np.array(["1", "X", "2"])
+
+# Portfolio solver: exact expectation up to this many win-count combinations,
+# mean-variance approximation above it; projected-gradient budget
+PORTFOLIO_EXACT_SCENARIOS = 16384
+PORTFOLIO_ITERATIONS = 500
+PORTFOLIO_TOLERANCE = 1e-9
+
+
+def evaluate(probs, odds, min_edge: float, kelly_fraction: float,
+             max_kelly_pct: float, conf_mult: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """Pick the best-edge outcome per match and size it.
+
+    probs are model probabilities in percent and odds decimal prices,
+    both shaped (N, K); a price of 0 means no market. Returns arrays of
+    length N: outcome (column index), prob, odds, edge, confidence
+    (index into CONFIDENCE_LEVELS), kelly (bankroll fraction) and
+    selected (edge >= min_edge).
+    """
+    probs = np.asarray(probs, dtype=float)
+    odds = np.asarray(odds, dtype=float)
+    conf_mult = conf_mult or CONF_MULT
+    rows = np.arange(probs.shape[0])
+
+    # Fair odds and edge per outcome, same arithmetic as the loop
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fair_odds = 100 / probs
+        edges = ((odds - fair_odds) / fair_odds) * 100
+    edges = np.where(np.isnan(edges), -np.inf, edges)
+
+    # First outcome with the highest edge; the loop only accepts edges above -100
+    outcome = np.argmax(edges, axis=1)
+    best_edge = edges[rows, outcome]
+    prob = probs[rows, outcome]
+    price = odds[rows, outcome]
+
+    confidence = np.where(
+        (best_edge >= 25) & (prob >= 60), 2,
+        np.where((best_edge >= 15) | (prob >= 50), 1, 0)
+    )
+
+    multipliers = np.array([conf_mult["LOW"], conf_mult["MEDIUM"], conf_mult["HIGH"]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kelly = ((price - 1) * (prob / 100) - (1 - prob / 100)) / (price - 1)
+    kelly = kelly * (kelly_fraction * multipliers[confidence])
+    kelly = np.clip(np.nan_to_num(kelly, nan=0.0), 0, max_kelly_pct)
+
+    selected = (best_edge > -100) & (best_edge >= min_edge) & (odds[:, 0] != 0)
+
+    return {
+        "outcome": outcome,
+        "prob": prob,
+        "odds": price,
+        "edge": best_edge,
+        "confidence": confidence,
+        "kelly": kelly,
+        "selected": selected
+    }
+
+
+def rank(result: Dict[str, np.ndarray]) -> np.ndarray:
+    """Indices of selected matches, best rounded edge first (stable)."""
+    picked = np.flatnonzero(result["selected"])
+
+    # Python's round() is what tips display and sort on; np.round differs in the last bit
+    keys = np.array([-round(edge, 1) for edge in result["edge"][picked].tolist()])
+    return picked[np.argsort(keys, kind="stable")]
+
+
+def portfolio(probs, odds, stakes, cap: float) -> np.ndarray:
+    """Jointly re-size simultaneous bets so their total stays within cap.
+
+    probs (percent), odds and stakes (bankroll fractions) are length-n
+    arrays for independent bets settling together. Each stake is an upper
+    bound; when they already fit under cap they are returned unchanged.
+    Otherwise expected log bankroll growth is maximized over the box
+    0 <= f <= stakes, sum(f) <= cap by projected gradient ascent, so the
+    cap goes to the bets that add most growth. Identical bets share one
+    variable and always get identical stakes. The expectation is exact
+    (enumerated over win counts) for small slates and a mean-variance
+    approximation otherwise; if the solve does not beat pro-rata scaling
+    to the cap, pro-rata stakes are returned.
+    """
+    stakes = np.asarray(stakes, dtype=float)
+    if stakes.sum() <= cap or len(stakes) == 0:
+        return stakes.copy()
+
+    p = np.asarray(probs, dtype=float) / 100
+    odds = np.asarray(odds, dtype=float)
+
+    groups, inverse, counts = np.unique(
+        np.stack([p, odds, stakes], axis=1), axis=0, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+
+    # Variables are each group's total stake
+    upper = groups[:, 2] * counts
+    if np.log(counts + 1).sum() <= np.log(PORTFOLIO_EXACT_SCENARIOS):
+        growth, curvature = _exact_growth(groups[:, 0], groups[:, 1], counts)
+    else:
+        growth, curvature = _approximate_growth(groups[:, 0], groups[:, 1], counts)
+    curvature = np.maximum(curvature / (1 - min(cap, 0.99)) ** 2, 1e-12)
+
+    pro_rata = upper * (cap / upper.sum())
+    solved = _ascend(growth, pro_rata, upper, cap, 1 / curvature)
+    if growth(solved)[0] <= growth(pro_rata)[0]:
+        solved = pro_rata
+
+    return (solved / counts)[inverse]
+
+
+def _exact_growth(p: np.ndarray, odds: np.ndarray, counts: np.ndarray):
+    """E[log wealth] and its gradient, enumerated over every win-count combination."""
+    wins = np.stack([g.ravel() for g in np.meshgrid(*[np.arange(c + 1) for c in counts], indexing="ij")], axis=1)
+
+    weights = np.ones(len(wins))
+    for k, (prob, count) in enumerate(zip(p, counts)):
+        pmf = np.array([math.comb(int(count), w) * prob ** w * (1 - prob) ** (count - w) for w in range(count + 1)])
+        weights *= pmf[wins[:, k]]
+
+    # Return per unit of group stake, for each combination
+    returns = wins * odds / counts - 1
+
+    def growth(h):
+        wealth = 1 + returns @ h
+        return weights @ np.log(wealth), (weights / wealth) @ returns
+
+    return growth, weights @ returns ** 2
+
+
+def _approximate_growth(p: np.ndarray, odds: np.ndarray, counts: np.ndarray):
+    """Second-order E[log wealth]: log(1 + mean) - variance / (2 (1 + mean)^2)."""
+    mean = p * odds - 1
+    var = p * (1 - p) * odds ** 2 / counts
+
+    def growth(h):
+        w = 1 + mean @ h
+        spread = var @ (h * h)
+        value = np.log(w) - spread / (2 * w * w)
+        gradient = mean / w - var * h / (w * w) + spread * mean / w ** 3
+        return value, gradient
+
+    return growth, mean ** 2 + var
+
+
+def _ascend(growth, start: np.ndarray, upper: np.ndarray, cap: float, scale: np.ndarray) -> np.ndarray:
+    """Diagonally scaled projected gradient ascent with backtracking."""
+    h = start
+    value, gradient = growth(h)
+    step = 1.0
+
+    for _ in range(PORTFOLIO_ITERATIONS):
+        while True:
+            candidate = _project(h + step * scale * gradient, upper, cap, scale)
+            new_value, new_gradient = growth(candidate)
+            if new_value >= value + 1e-4 * gradient @ (candidate - h) or step < 1e-8:
+                break
+            step /= 2
+
+        moved = np.abs(candidate - h).max()
+        if new_value >= value:
+            h, value, gradient = candidate, new_value, new_gradient
+        step = min(step * 2, 1.0)
+        if moved < PORTFOLIO_TOLERANCE:
+            break
+
+    return h
+
+
+def _project(v: np.ndarray, upper: np.ndarray, cap: float, scale: np.ndarray) -> np.ndarray:
+    """Projection onto {0 <= f <= upper, sum(f) <= cap} in the metric 1/scale."""
+    f = np.clip(v, 0, upper)
+    if f.sum() <= cap:
+        return f
+
+    # Shift each coordinate down by tau * scale, tau found by bisection
+    lo, hi = 0.0, float((v / scale).max())
+    for _ in range(50):
+        tau = (lo + hi) / 2
+        if np.clip(v - tau * scale, 0, upper).sum() > cap:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(v - hi * scale, 0, upper)
+
+
+def allocate(windows, probs, odds, stakes, cap: float) -> np.ndarray:
+    """Apply portfolio() to each group of bets sharing a settlement window."""
+    windows = np.asarray(windows)
+    stakes = np.asarray(stakes, dtype=float)
+    probs, odds = np.asarray(probs, dtype=float), np.asarray(odds, dtype=float)
+    sized = stakes.copy()
+
+    for window in np.unique(windows):
+        members = np.flatnonzero(windows == window)
+        if stakes[members].sum() > cap:
+            sized[members] = portfolio(probs[members], odds[members], stakes[members], cap)
+
+    return sized
+
+
+def _evaluate_loop(probs, odds, min_edge, kelly_fraction, max_kelly_pct):
+    """The original generate_tips loop over plain lists, kept as the reference."""
+    tips = []
+
+    for i, (match_probs, match_odds) in enumerate(zip(probs, odds)):
+        if match_odds[0] == 0:
+            continue
+
+        best_bet = None
+        best_edge = -100
+
+        for outcome, (prob, price) in enumerate(zip(match_probs, match_odds)):
+            fair_odds = 100 / prob
+            edge = ((price - fair_odds) / fair_odds) * 100
+
+            if edge > best_edge:
+                best_edge = edge
+                best_bet = (outcome, prob, price)
+
+        if best_bet and best_edge >= min_edge:
+            outcome, prob, price = best_bet
+
+            if best_edge >= 25 and prob >= 60:
+                confidence = "HIGH"
+            elif best_edge >= 15 or prob >= 50:
+                confidence = "MEDIUM"
+            else:
+                confidence = "LOW"
+
+            kelly = ((price - 1) * (prob / 100) - (1 - prob / 100)) / (price - 1)
+            kelly *= kelly_fraction * CONF_MULT[confidence]
+            kelly = max(0, min(kelly, max_kelly_pct))
+
+            tips.append((i, outcome, round(best_edge, 1), confidence, round(kelly * 100, 2)))
+
+    tips.sort(key=lambda x: -x[2])
+    return tips
+
+
+def benchmark(n: int = 10000, seed: int = 7) -> Dict:
+    """Time loop vs vectorized evaluation on n random fixtures and check they agree."""
+    rng = random.Random(seed)
+    probs, odds = [], []
+
+    for _ in range(n):
+        home, draw = rng.uniform(15, 70), rng.uniform(15, 30)
+        p = [round(home, 1), round(draw, 1), round(100 - home - draw, 1)]
+        probs.append([max(p_i, 0.1) for p_i in p])
+        odds.append([round(rng.uniform(1.2, 8.0), 2) if rng.random() > 0.05 else 0 for _ in range(3)])
+
+    params = dict(min_edge=10, kelly_fraction=0.35, max_kelly_pct=0.075)
+
+    start = time.perf_counter()
+    expected = _evaluate_loop(probs, odds, **params)
+    loop_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    result = evaluate(np.array(probs), np.array(odds), **params)
+    order = rank(result)
+    vector_ms = (time.perf_counter() - start) * 1000
+
+    actual = [(
+        int(i), int(result["outcome"][i]), round(float(result["edge"][i]), 1),
+        str(CONFIDENCE_LEVELS[result["confidence"][i]]), round(float(result["kelly"][i]) * 100, 2)
+    ) for i in order]
+
+    return {
+        "fixtures": n,
+        "tips": len(expected),
+        "identical": actual == expected,
+        "loop_ms": round(loop_ms, 1),
+        "vectorized_ms": round(vector_ms, 1),
+        "speedup": round(loop_ms / vector_ms, 1) if vector_ms else None
+    }
+
+
+def benchmark_portfolio(n: int = 300, cap: float = 0.25, seed: int = 7) -> Dict:
+    """Time the portfolio solver on n simultaneous random bets."""
+    rng = np.random.default_rng(seed)
+    odds = rng.uniform(1.5, 6.0, n)
+    probs = np.minimum(100 / odds * rng.uniform(1.05, 1.3, n), 95)
+    stakes = np.clip(((odds - 1) * probs / 100 - (1 - probs / 100)) / (odds - 1) * 0.35, 0, 0.075)
+
+    start = time.perf_counter()
+    sized = portfolio(probs, odds, stakes, cap)
+    solve_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "bets": n,
+        "requested": round(float(stakes.sum()), 4),
+        "allocated": round(float(sized.sum()), 4),
+        "cap": cap,
+        "solve_ms": round(solve_ms, 1)
+    }
+
+
+def main():
+    """Command-line entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        for n in [int(sys.argv[2])] if len(sys.argv) > 2 else [10000, 100000]:
+            print(benchmark(n))
+    elif len(sys.argv) > 1 and sys.argv[1] == "portfolio":
+        for n in [int(sys.argv[2])] if len(sys.argv) > 2 else [30, 100, 300, 500]:
+            print(benchmark_portfolio(n))
+    else:
+        print("Usage:")
+        print("  python3 staking.py bench [fixtures]    # Compare against the loop")
+        print("  python3 staking.py portfolio [bets]    # Time the portfolio solver")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Live Update Stream
+===================================
+Server-Sent Events for the web app. Writers publish small deltas
+(new tips after analysis, settled tips, changed settings) to an
+append-only table; every open stream, in any worker, notices them by
+polling the shared data version and forwards the rows it has not sent.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import db
+
+POLL_INTERVAL = 1.0          # seconds between data-version checks per stream
+HEARTBEAT = 5.0              # comment line that keeps proxies open and finds closed clients
+STREAM_LIFETIME = 300.0      # streams end after this; EventSource reconnects on its own
+RETRY_MS = 2000              # reconnect delay sent to the browser
+RETENTION = 24 * 3600        # published events kept for resuming clients
+
+# Each WSGI stream holds a request thread, so only some of them may stream;
+# past the limit clients are turned away and poll instead
+MAX_STREAMS = int(os.environ.get("MAX_STREAMS", 4))
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS stream_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    ''',
+    # Publishing bumps the data version so streams wake up for it
+    '''
+    CREATE TRIGGER IF NOT EXISTS stream_events_version_insert
+    AFTER INSERT ON stream_events
+    BEGIN
+        UPDATE meta SET value = value + 1 WHERE key = 'data_version';
+    END
+    ''',
+    # Tips get a version of their own, so other writes (ratings, job
+    # progress, performance totals) do not make every page refetch them
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('tips_version', 1)",
+] + [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tips_revision_{event.lower()}
+    AFTER {event} ON tips
+    BEGIN
+        UPDATE meta SET value = value + 1 WHERE key = 'tips_version';
+    END
+    '''
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+
+
+_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+
+def install(conn: sqlite3.Connection):
+    """Create the event table and tips version; needs the meta and tips tables."""
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def _publish(conn: sqlite3.Connection, kind: str, payload: str):
+    now = time.time()
+    conn.execute("DELETE FROM stream_events WHERE created_at < ?", (now - RETENTION,))
+    conn.execute("INSERT INTO stream_events (kind, payload, created_at) VALUES (?, ?, ?)", (kind, payload, now))
+
+
+def publish(kind: str, payload: Dict):
+    """Queue an event for every open stream."""
+    db.write(_publish, kind, json.dumps(payload))
+
+
+def latest_id() -> int:
+    """Id of the newest published event, or 0."""
+    row = db.query_one("SELECT MAX(id) FROM stream_events")
+    return row[0] or 0
+
+
+def tips_version() -> int:
+    """Current tips version, bumped on every tips write."""
+    row = db.query_one("SELECT value FROM meta WHERE key = 'tips_version'")
+    return row[0] if row else 0
+
+
+def since(last_id: int) -> List[Tuple[int, str, str]]:
+    """Events published after last_id, oldest first."""
+    return db.query("SELECT id, kind, payload FROM stream_events WHERE id > ? ORDER BY id", (last_id,))
+
+
+def format_event(kind: str, data: str, event_id: Optional[int] = None) -> str:
+    """One SSE message."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {kind}\ndata: {data}\n\n"
+
+
+def reserve() -> bool:
+    """Claim one of this process' stream slots without waiting."""
+    return _slots.acquire(blocking=False)
+
+
+def release():
+    """Give back a slot taken by reserve(); call exactly once per reservation."""
+    _slots.release()
+
+
+def listen(last_id: Optional[int] = None, poll: float = POLL_INTERVAL,
+           lifetime: float = STREAM_LIFETIME) -> Iterator[str]:
+    """SSE lines for one client, starting after last_id (Last-Event-ID).
+
+    Tips written with no event to go with them (e.g. by a cron run) are
+    announced as a bare "version" event so the client refetches; other
+    writes are not.
+    """
+    if last_id is None:
+        last_id = latest_id()
+    version = db.data_version()
+    tips = tips_version()
+
+    yield f"retry: {RETRY_MS}\n\n"
+
+    # Catch a reconnecting client up on what it missed
+    for event_id, kind, payload in since(last_id):
+        last_id = event_id
+        yield format_event(kind, payload, event_id)
+
+    deadline = time.monotonic() + lifetime
+    last_sent = time.monotonic()
+
+    while time.monotonic() < deadline:
+        time.sleep(poll)
+        current = db.data_version()
+
+        if current != version:
+            version = current
+            events = since(last_id)
+            for event_id, kind, payload in events:
+                last_id = event_id
+                yield format_event(kind, payload, event_id)
+
+            sent = bool(events)
+
+            # Events carry their own data; only unannounced tip changes need a refetch
+            seen, tips = tips, tips_version()
+            if not events and tips != seen:
+                yield format_event("version", json.dumps({"version": current}))
+                sent = True
+
+            if sent:
+                last_sent = time.monotonic()
+
+        elif time.monotonic() - last_sent >= HEARTBEAT:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
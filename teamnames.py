@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Team Name Index
+================================
+Football-Data, The Odds API and our own ratings spell clubs differently
+("FC Bayern München" vs "Bayern Munich"). Names are reduced to a
+normalized key (casefolded, accent-stripped, club suffixes dropped) and
+mapped through an alias table, so joins become O(1) dict lookups.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tokens that carry no identity ("FC", "Calcio", founding years ...)
+STOPWORDS = {
+    "fc", "afc", "cf", "sc", "ssc", "sl", "as", "ac", "cd", "ud", "sv", "vfb", "vfl",
+    "club", "de", "calcio", "football", "futbol", "clube", "1", "04", "05", "09",
+}
+
+# Normalized variant -> normalized canonical key
+ALIASES = {
+    "bayern munchen": "bayern munich",
+    "borussia dortmund": "dortmund",
+    "bayer leverkusen": "leverkusen",
+    "rasenballsport leipzig": "rb leipzig",
+    "leipzig": "rb leipzig",
+    "internazionale milano": "inter milan",
+    "internazionale": "inter milan",
+    "inter": "inter milan",
+    "milan": "ac milan",
+    "atletico": "atletico madrid",
+    "paris saint germain": "psg",
+    "paris sg": "psg",
+    "losc lille": "lille",
+    "lille osc": "lille",
+    "psv": "psv eindhoven",
+    "feyenoord rotterdam": "feyenoord",
+    "sport lisboa e benfica": "benfica",
+    "sporting portugal": "sporting cp",
+    "sporting lisbon": "sporting cp",
+    "sporting": "sporting cp",
+    "man city": "manchester city",
+    "man united": "manchester united",
+    "man utd": "manchester united",
+    "manchester utd": "manchester united",
+    "tottenham hotspur": "tottenham",
+    "spurs": "tottenham",
+    "newcastle united": "newcastle",
+    "brighton and hove albion": "brighton",
+    "wolverhampton wanderers": "wolves",
+    "west ham united": "west ham",
+    "leicester": "leicester city",
+    "leeds": "leeds united",
+}
+
+
+def normalize(name: str) -> str:
+    """Casefold, strip accents and punctuation, and drop club suffixes."""
+    if not name:
+        return ""
+
+    text = unicodedata.normalize("NFKD", name.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.replace("&", " and ")
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+
+    tokens = [t for t in text.split() if t not in STOPWORDS and not re.fullmatch(r"\d{4}", t)]
+    return " ".join(tokens)
+
+
+@lru_cache(maxsize=8192)
+def team_key(name: str) -> str:
+    """Canonical key for a team name."""
+    key = normalize(name)
+    return ALIASES.get(key, key)
+
+
+class TeamIndex:
+    """Canonical key -> value (e.g. our ratings) for fuzzy-named lookups."""
+
+    def __init__(self, values: Dict[str, Any]):
+        self._values = {team_key(name): value for name, value in values.items()}
+        self.lookups = 0
+        self.hits = 0
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Value for any spelling of a team, or default."""
+        self.lookups += 1
+        value = self._values.get(team_key(name))
+        if value is None:
+            return default
+        self.hits += 1
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        return team_key(name) in self._values
+
+    def metrics(self) -> Dict:
+        """Lookup count and hit rate."""
+        return _rate(self.lookups, self.hits)
+
+
+class FixtureIndex:
+    """(home, away) team keys -> items, disambiguated by kickoff time."""
+
+    def __init__(self, window: timedelta = timedelta(hours=36)):
+        self.window = window
+        self._items: Dict[Tuple[str, str], List[Tuple[Optional[datetime], Any]]] = defaultdict(list)
+        self.lookups = 0
+        self.hits = 0
+        self.misses: List[Tuple[str, str]] = []
+
+    def add(self, home: str, away: str, kickoff: Optional[str], item: Any):
+        """Index an item under its fixture."""
+        self._items[(team_key(home), team_key(away))].append((parse_kickoff(kickoff), item))
+
+    def get(self, home: str, away: str, kickoff: Optional[str] = None) -> Any:
+        """Item for the fixture nearest kickoff within the window, or None."""
+        self.lookups += 1
+        candidates = self._items.get((team_key(home), team_key(away)), [])
+        when = parse_kickoff(kickoff)
+
+        best, best_gap = None, None
+        for item_kickoff, item in candidates:
+            if when is None or item_kickoff is None:
+                gap = timedelta(0)
+            else:
+                gap = abs(item_kickoff - when)
+                if gap > self.window:
+                    continue
+            if best_gap is None or gap < best_gap:
+                best, best_gap = item, gap
+
+        if best_gap is None:
+            if len(self.misses) < 50:
+                self.misses.append((home, away))
+            return None
+
+        self.hits += 1
+        return best
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._items.values())
+
+    def metrics(self) -> Dict:
+        """Lookup count, hit rate and a sample of unmatched fixtures."""
+        return {**_rate(self.lookups, self.hits), "misses": self.misses[:10]}
+
+
+def parse_kickoff(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date or datetime ("2026-02-15", "2026-02-15T15:00:00Z")."""
+    if not value:
+        return None
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+    # Date-only values mean "some time that day"
+    if len(value) == 10:
+        when += timedelta(hours=12)
+    return when.replace(tzinfo=None)
+
+
+def _rate(lookups: int, hits: int) -> Dict:
+    return {
+        "lookups": lookups,
+        "hits": hits,
+        "match_rate": round(hits / lookups * 100, 1) if lookups else None
+    }
@@ -0,0 +1,83 @@
+"""Tests for the trigger-maintained performance totals and analytics cube."""
+
+import pytest
+
+import aggregates
+import db
+from test_tips import make_tip
+
+
+def _churn(app):
+    """Inserts, settlements, edits of settled rows and deletes."""
+    app.save_tips([
+        make_tip(f"Club {i}", date=f"2026-0{1 + i % 3}-1{i % 9}", odds=1.3 + i * 0.4,
+                 confidence=("HIGH", "MEDIUM", "LOW")[i % 3],
+                 league=("Premier League", "La Liga")[i % 2])
+        for i in range(12)
+    ])
+    db.execute("UPDATE tips SET status = 'resulted', win = 1, actual_outcome = 'Home Win' WHERE home_team IN ('Club 0', 'Club 3', 'Club 4')")
+    db.execute("UPDATE tips SET status = 'resulted', win = 0, actual_outcome = 'Draw' WHERE home_team IN ('Club 1', 'Club 5', 'Club 8')")
+    # A correction to a settled tip moves it between cube cells
+    db.execute("UPDATE tips SET win = 0, odds = 5.5 WHERE home_team = 'Club 3'")
+    db.execute("UPDATE tips SET kelly_units = 35 WHERE home_team = 'Club 5'")
+    db.execute("DELETE FROM tips WHERE home_team IN ('Club 4', 'Club 7')")
+
+
+def _rebuilt(read):
+    """What read() returns after a from-scratch rebuild."""
+    db.write(aggregates.rebuild)
+    return read()
+
+
+def test_totals_match_a_rebuild(web, no_tips):
+    _churn(web.betting_app)
+    totals = aggregates.read_totals()
+
+    assert totals == pytest.approx(_rebuilt(aggregates.read_totals))
+    assert (totals["total_tips"], totals["pending"], totals["resulted"], totals["wins"]) == (10, 5, 5, 1)
+
+
+def test_totals_by_hand(web, no_tips):
+    web.betting_app.save_tips([make_tip("Win", odds=2.5), make_tip("Loss", odds=3.0)])
+    db.execute("UPDATE tips SET status = 'resulted', win = (home_team = 'Win')")
+
+    totals = aggregates.read_totals()
+    assert totals["staked"] == pytest.approx(40.0)
+    assert totals["profit"] == pytest.approx(20.0 * 1.5 - 20.0)
+
+
+def test_empty_table_totals(web, no_tips):
+    assert aggregates.read_totals() == pytest.approx({col: 0 for col in aggregates._CONTRIB})
+
+
+def _cube():
+    columns = ", ".join(list(aggregates.CUBE_DIMENSIONS) + list(aggregates.CUBE_MEASURES))
+    return db.query(f"SELECT {columns} FROM analytics_cube WHERE tips > 0 ORDER BY 1, 2, 3, 4")
+
+
+def test_cube_matches_a_rebuild(web, no_tips):
+    _churn(web.betting_app)
+    cube = _cube()
+    rebuilt = _rebuilt(_cube)
+
+    assert [row[:6] for row in cube] == [row[:6] for row in rebuilt]
+    assert [row[6:] for row in cube] == [pytest.approx(row[6:]) for row in rebuilt]
+    assert sum(row[4] for row in cube) == 5
+
+
+def test_cube_rollups(web, no_tips):
+    _churn(web.betting_app)
+
+    by_league = {row[0]: row[1:3] for row in aggregates.read_cube(["league"])}
+    assert by_league == {"Premier League": (2, 1), "La Liga": (3, 0)}
+
+    (total,) = aggregates.read_cube([])
+    assert total[:2] == (5, 1)
+
+    sliced = aggregates.read_cube(["confidence"], {"league": "La Liga"})
+    assert sum(row[1] for row in sliced) == 3
+
+
+def test_cube_rejects_unknown_dimensions(web):
+    with pytest.raises(ValueError):
+        aggregates.read_cube(["home_team"])
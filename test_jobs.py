@@ -0,0 +1,108 @@
+"""Tests for single-flight background jobs."""
+
+import sqlite3
+import threading
+import time
+import uuid
+
+import pytest
+
+import db
+import jobs
+
+
+@pytest.fixture
+def kind(web):
+    """A job kind no other test uses."""
+    name = f"test-{uuid.uuid4().hex[:8]}"
+    yield name
+    db.execute("DELETE FROM jobs WHERE kind = ?", (name,))
+
+
+def _wait(job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_second_submit_joins_the_active_job(kind):
+    release = threading.Event()
+    calls = []
+
+    def work(job):
+        calls.append(job.id)
+        with job.stage("wait"):
+            release.wait(5)
+        return {"ok": True}
+
+    first, started = jobs.submit(kind, work)
+    second, started_again = jobs.submit(kind, work)
+    release.set()
+
+    assert started and not started_again
+    assert second == first
+
+    job = _wait(first)
+    assert job["status"] == "done"
+    assert job["result"] == {"ok": True}
+    assert [stage["name"] for stage in job["stages"]] == ["wait"]
+    assert calls == [first]
+
+    # Once finished, the slot is free again
+    third, started = jobs.submit(kind, lambda job: {})
+    assert started and third != first
+    _wait(third)
+
+
+def test_unique_index_allows_one_active_job_per_kind(kind):
+    insert = "INSERT INTO jobs (id, kind, status, created_at) VALUES (?, ?, ?, ?)"
+    db.execute(insert, (uuid.uuid4().hex, kind, "running", time.time()))
+    db.execute(insert, (uuid.uuid4().hex, kind, "done", time.time()))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db.execute(insert, (uuid.uuid4().hex, kind, "queued", time.time()))
+
+
+def test_failures_are_recorded(kind):
+    def work(job):
+        raise RuntimeError("upstream down")
+
+    job_id, _ = jobs.submit(kind, work)
+    job = _wait(job_id)
+
+    assert job["status"] == "failed"
+    assert job["error"] == "upstream down"
+
+
+def test_abandoned_job_frees_its_slot(kind):
+    stale = time.time() - jobs.STALE_AFTER - 1
+    db.execute(
+        "INSERT INTO jobs (id, kind, status, created_at, heartbeat) VALUES ('dead-' || ?, ?, 'running', ?, ?)",
+        (kind, kind, stale, stale)
+    )
+
+    job_id, started = jobs.submit(kind, lambda job: {})
+
+    assert started
+    assert jobs.get(f"dead-{kind}")["error"] == "abandoned"
+    _wait(job_id)
+
+
+def test_old_finished_jobs_are_deleted(kind):
+    old = time.time() - jobs.RETENTION - 1
+    db.execute(
+        "INSERT INTO jobs (id, kind, status, created_at, finished_at) VALUES ('old-' || ?, ?, 'done', ?, ?)",
+        (kind, kind, old, old)
+    )
+
+    _wait(jobs.submit(kind, lambda job: {})[0])
+
+    assert jobs.get(f"old-{kind}") is None
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/jobs/nope").status_code == 404
@@ -0,0 +1,54 @@
+"""Tests for multi-market pricing and settlement."""
+
+import numpy as np
+import pytest
+
+import markets
+
+
+@pytest.mark.parametrize("selection, score, result", [
+    ("Over 2.5", (2, 1), True),
+    ("Over 2.5", (1, 1), False),
+    ("Under 2.5", (1, 1), True),
+    ("BTTS Yes", (1, 1), True),
+    ("BTTS Yes", (2, 0), False),
+    ("BTTS No", (0, 0), True),
+    ("AH Home -1.5", (3, 1), True),
+    ("AH Home -1.5", (2, 1), False),
+    ("AH Away +1.5", (2, 1), True),
+    ("AH Home -1", (2, 1), None),
+    ("AH Away +1", (2, 1), None),
+    ("AH Home 0", (1, 1), None),
+    ("AH Away +0.5", (1, 1), True),
+    ("DNB Home", (2, 1), True),
+    ("DNB Away", (2, 1), False),
+    ("DNB Home", (0, 0), None),
+    ("Correct Score 2-1", (2, 1), True),
+    ("Correct Score 2-1", (1, 2), False),
+])
+def test_settle(selection, score, result):
+    assert markets.settle(selection, *score) is result
+
+
+def test_whole_goal_total_is_void():
+    # Not offered by SELECTIONS, but an odds feed may still carry it
+    assert markets.settle("Over 2", 1, 1) is None
+    assert markets.settle("Under 2", 2, 0) is None
+
+
+def test_unknown_selection_raises():
+    with pytest.raises(ValueError):
+        markets.settle("Half Time 1", 1, 0)
+
+
+@pytest.mark.parametrize("score", [(0, 0), (1, 0), (1, 1), (2, 1), (0, 3), (4, 4), (5, 2)])
+def test_prices_agree_with_settlement(score):
+    """On a certain scoreline every selection's win/push price is 0 or 1, as settle() says."""
+    matrix = np.zeros((1, 10, 10))
+    matrix[0][score] = 1.0
+    win, push = markets.price(matrix)
+
+    for i, selection in enumerate(markets.SELECTIONS):
+        result = markets.settle(selection, *score)
+        assert push[0, i] == (1.0 if result is None else 0.0), selection
+        assert win[0, i] == (1.0 if result else 0.0), selection
@@ -0,0 +1,36 @@
+"""Tests for the staking parameter optimizer."""
+
+import pytest
+
+import app
+import db
+import optimizer
+import settings
+import stream
+
+
+@pytest.fixture
+def clean_settings(web):
+    db.execute("DELETE FROM settings")
+    app.SETTINGS.refresh()
+    yield
+    db.execute("DELETE FROM settings")
+    app.SETTINGS.refresh()
+
+
+def test_save_goes_through_the_settings_store(clean_settings):
+    last_event = stream.latest_id()
+    params = {"kelly_fraction": 0.25, "max_kelly_pct": 0.05, "min_edge": 8.0, "conf_mult": {"LOW": 0.3}}
+
+    stored = optimizer.save(params)
+
+    assert app.CONFIG["kelly_fraction"] == 0.25
+    assert stored["conf_mult"]["LOW"] == 0.3
+    assert [kind for _, kind, _ in stream.since(last_event)] == ["settings"]
+
+
+def test_save_rejects_out_of_bounds_params(clean_settings):
+    before = settings.version()
+    with pytest.raises(ValueError):
+        optimizer.save({"kelly_fraction": 1.5})
+    assert settings.version() == before
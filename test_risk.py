@@ -0,0 +1,30 @@
+"""Tests for the bankroll risk endpoint."""
+
+import pytest
+
+import risk
+
+
+@pytest.mark.parametrize("query", [
+    "stake_scale=0",
+    "stake_scale=-1",
+    "stake_scale=nan",
+    "stake_scale=inf",
+    "ruin_pct=0",
+    "ruin_pct=100",
+    "ruin_pct=-5",
+    "ruin_pct=nan",
+    "max_kelly_pct=0",
+    "max_kelly_pct=1.5",
+    "paths=0",
+    f"paths={risk.MAX_PATHS}&bets={risk.MAX_BETS}",
+])
+def test_invalid_parameters_are_rejected(client, query):
+    response = client.get(f"/api/risk?{query}")
+    assert response.status_code == 400
+    assert response.json["error"]
+
+
+def test_valid_parameters_are_accepted(client):
+    response = client.get("/api/risk?paths=200&bets=20&stake_scale=0.5&ruin_pct=25&max_kelly_pct=0.05")
+    assert response.status_code == 200
@@ -0,0 +1,90 @@
+"""Tests for the shared settings store."""
+
+import json
+
+import pytest
+
+import db
+import settings
+
+
+def _config():
+    return {
+        "bankroll": 1000,
+        "kelly_fraction": 0.35,
+        "max_kelly_pct": 0.075,
+        "min_edge": 10,
+        "max_exposure_pct": 0.25,
+        "conf_mult": {"HIGH": 1.0, "MEDIUM": 0.7, "LOW": 0.4},
+    }
+
+
+@pytest.fixture
+def store(web):
+    db.execute("DELETE FROM settings")
+    yield settings.SettingsStore(_config())
+    db.execute("DELETE FROM settings")
+
+
+@pytest.mark.parametrize("values", [
+    {"bankroll": 0},
+    {"bankroll": -5},
+    {"bankroll": "1000"},
+    {"bankroll": None},
+    {"bankroll": True},
+    {"kelly_fraction": 1.5},
+    {"max_kelly_pct": -0.1},
+    {"max_exposure_pct": 2},
+    {"min_edge": -1},
+    {"conf_mult": {"HIGH": -1}},
+    {"conf_mult": [1, 2]},
+    {"unknown": 1},
+])
+def test_validate_rejects_out_of_bounds(values):
+    with pytest.raises(ValueError):
+        settings.validate(values, _config()["conf_mult"])
+
+
+def test_validate_accepts_bounds_and_merges_conf_mult():
+    checked = settings.validate(
+        {"bankroll": 0.01, "kelly_fraction": 1, "max_kelly_pct": 0, "min_edge": 0, "conf_mult": {"HIGH": 1.2}},
+        _config()["conf_mult"]
+    )
+    assert checked["kelly_fraction"] == 1
+    assert checked["conf_mult"] == {"HIGH": 1.2, "MEDIUM": 0.7, "LOW": 0.4}
+
+
+def test_update_is_seen_by_another_store(store):
+    other = settings.SettingsStore(_config())
+    other.refresh()
+
+    store.update({"bankroll": 2500, "conf_mult": {"LOW": 0.5}})
+
+    assert other.refresh()
+    assert other.config["bankroll"] == 2500
+    assert other.config["conf_mult"]["LOW"] == 0.5
+    assert not other.refresh()
+
+
+def test_update_rejects_without_writing(store):
+    before = settings.version()
+    with pytest.raises(ValueError):
+        store.update({"bankroll": 0})
+    assert settings.version() == before
+    assert store.config["bankroll"] == 1000
+
+
+def test_invalid_stored_rows_fall_back_to_defaults(store):
+    db.executemany("INSERT INTO settings (key, value) VALUES (?, ?)", [
+        ("bankroll", json.dumps("1000")),
+        ("min_edge", "null"),
+        ("kelly_fraction", "not json"),
+        ("max_kelly_pct", json.dumps(0.05)),
+    ])
+
+    store.refresh()
+
+    assert store.config["bankroll"] == 1000
+    assert store.config["min_edge"] == 10
+    assert store.config["kelly_fraction"] == 0.35
+    assert store.config["max_kelly_pct"] == 0.05
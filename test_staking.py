@@ -0,0 +1,58 @@
+"""Tests for vectorized value-bet evaluation."""
+
+import random
+
+import numpy as np
+import pytest
+
+import staking
+
+PARAMS = dict(min_edge=10, kelly_fraction=0.35, max_kelly_pct=0.075)
+
+
+def _vectorized(probs, odds, **params):
+    """evaluate() + rank() in the loop's (index, outcome, edge, confidence, kelly %) form."""
+    result = staking.evaluate(np.array(probs, dtype=float), np.array(odds, dtype=float), **params)
+    return [(
+        int(i), int(result["outcome"][i]), round(float(result["edge"][i]), 1),
+        str(staking.CONFIDENCE_LEVELS[result["confidence"][i]]), round(float(result["kelly"][i]) * 100, 2)
+    ) for i in staking.rank(result)]
+
+
+@pytest.mark.parametrize("seed", [1, 7, 42])
+@pytest.mark.parametrize("min_edge", [-50, 0, 10, 25])
+def test_matches_the_reference_loop(seed, min_edge):
+    rng = random.Random(seed)
+    probs, odds = [], []
+    for _ in range(2000):
+        home, draw = rng.uniform(15, 70), rng.uniform(15, 30)
+        probs.append([max(round(p, 1), 0.1) for p in (home, draw, 100 - home - draw)])
+        odds.append([round(rng.uniform(1.2, 8.0), 2) if rng.random() > 0.05 else 0 for _ in range(3)])
+
+    params = dict(PARAMS, min_edge=min_edge)
+    assert _vectorized(probs, odds, **params) == staking._evaluate_loop(probs, odds, **params)
+
+
+def test_edge_cases_match_the_reference_loop():
+    probs = [
+        [50.0, 25.0, 25.0],     # no home price: not a market
+        [50.0, 25.0, 25.0],     # edge exactly at min_edge
+        [40.0, 30.0, 30.0],     # tied best edges: first outcome wins
+        [50.0, 30.0, 20.0],     # every edge -100 or worse: nothing picked
+        [70.0, 20.0, 10.0],     # HIGH confidence, stake capped
+    ]
+    odds = [
+        [0, 4.0, 4.0],
+        [2.2, 3.0, 3.0],
+        [3.0, 4.0, 4.0],
+        [1.0, 0.5, 0.5],
+        [2.0, 6.0, 11.0],
+    ]
+    expected = staking._evaluate_loop(probs, odds, **PARAMS)
+
+    assert _vectorized(probs, odds, **PARAMS) == expected
+    assert [tip[0] for tip in expected] == [4, 2, 1]
+
+
+def test_benchmark_reports_agreement():
+    assert staking.benchmark(n=500)["identical"]
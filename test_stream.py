@@ -0,0 +1,80 @@
+"""Tests for the live update stream."""
+
+import threading
+
+import db
+import stream
+
+
+def test_head_does_not_take_a_stream_slot(client):
+    for _ in range(stream.MAX_STREAMS + 1):
+        response = client.head("/api/stream")
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+
+    response = client.get("/api/stream", buffered=False)
+    assert response.status_code == 200
+    response.close()
+
+
+def test_slot_released_when_body_never_read(client):
+    for _ in range(stream.MAX_STREAMS + 1):
+        response = client.get("/api/stream", buffered=False)
+        assert response.status_code == 200
+        response.close()
+
+    response = client.get("/api/stream", buffered=False)
+    assert response.status_code == 200
+    assert next(response.response) == f"retry: {stream.RETRY_MS}\n\n".encode()
+    response.close()
+
+
+def test_streams_past_the_limit_are_refused(client):
+    open_streams = [client.get("/api/stream", buffered=False) for _ in range(stream.MAX_STREAMS)]
+    try:
+        refused = client.get("/api/stream")
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"]
+    finally:
+        # One thread holds every request context here; unwind them in order
+        for response in reversed(open_streams):
+            response.close()
+
+    response = client.get("/api/stream", buffered=False)
+    assert response.status_code == 200
+    response.close()
+
+
+def _listen_during(write):
+    """Events from one short stream while write() runs in the background."""
+    timer = threading.Timer(0.2, write)
+    timer.start()
+    try:
+        return "".join(stream.listen(poll=0.05, lifetime=0.8))
+    finally:
+        timer.join()
+
+
+def test_writes_outside_tips_send_no_version_event(web):
+    try:
+        out = _listen_during(lambda: db.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('unused', '1')"))
+    finally:
+        db.execute("DELETE FROM settings WHERE key = 'unused'")
+    assert "event:" not in out
+
+
+def test_unannounced_tip_writes_send_a_version_event(web):
+    def write():
+        db.execute("INSERT INTO tips (home_team, away_team, date, status) VALUES ('Stream FC', 'Test FC', '2000-01-01', 'pending')")
+
+    try:
+        out = _listen_during(write)
+    finally:
+        db.execute("DELETE FROM tips WHERE home_team = 'Stream FC'")
+    assert out.count("event: version") == 1
+
+
+def test_published_events_are_sent_without_a_version_event(web):
+    out = _listen_during(lambda: stream.publish("settings", {"min_edge": 9}))
+    assert "event: settings" in out
+    assert "event: version" not in out
@@ -0,0 +1,90 @@
+"""Tests for tip persistence and paging."""
+
+import pytest
+
+import db
+from app import InvalidCursor, Match, Tip, parse_cursor
+
+
+def make_tip(home, away="Away FC", date="2026-03-01", odds=2.0, edge=10.0, confidence="HIGH", league="Premier League"):
+    match = Match(home, away, league, date, "15:00", 50, 25, 25, odds, 3.3, 3.1)
+    return Tip(match, "Home Win", confidence, edge, 2.0, 20.0, odds)
+
+
+def test_upsert_counts_inserts_updates_and_skips(web, no_tips):
+    app = web.betting_app
+
+    counts = app.save_tips([make_tip("Alpha"), make_tip("Beta"), make_tip("Gamma")])
+    assert (counts["inserted"], counts["updated"], counts["skipped"]) == (3, 0, 0)
+
+    # Settled tips are never overwritten by a later run
+    db.execute("UPDATE tips SET status = 'resulted', actual_outcome = 'Home Win', win = 1 WHERE home_team = 'Gamma'")
+
+    counts = app.save_tips([make_tip("Alpha", edge=12.5), make_tip("Gamma", edge=99.0), make_tip("Delta")])
+    assert (counts["inserted"], counts["updated"], counts["skipped"]) == (1, 1, 1)
+
+    rows = dict(db.query("SELECT home_team, edge FROM tips"))
+    assert rows == {"Alpha": 12.5, "Beta": 10.0, "Gamma": 10.0, "Delta": 10.0}
+
+
+def test_one_row_per_fixture(web, no_tips):
+    web.betting_app.save_tips([make_tip("Alpha"), make_tip("Alpha", edge=11.0)])
+
+    assert db.query("SELECT COUNT(*), MAX(edge) FROM tips") == [(1, 11.0)]
+
+
+def test_empty_run_writes_nothing(web, no_tips):
+    counts = web.betting_app.save_tips([])
+    assert (counts["inserted"], counts["updated"], counts["skipped"]) == (0, 0, 0)
+
+
+def test_parse_cursor():
+    assert parse_cursor("2026-03-01|42") == ("2026-03-01", 42)
+    # Only the last "|" separates the id
+    assert parse_cursor("a|b|7") == ("a|b", 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "2026-03-01", "2026-03-01|", "|5", "2026-03-01|x", "2026-03-01|-1"])
+def test_malformed_cursors_raise(cursor):
+    with pytest.raises(InvalidCursor):
+        parse_cursor(cursor)
+
+
+@pytest.mark.parametrize("path", ["/api/tips", "/api/history"])
+def test_malformed_cursor_is_a_bad_request(client, path):
+    response = client.get(f"{path}?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.json["error"] == "invalid cursor"
+
+
+def test_pages_cover_every_tip_once(web, client, no_tips):
+    # Several tips share a date, so the id has to break ties
+    web.betting_app.save_tips([
+        make_tip(f"Team {i:02}", date=f"2026-03-0{1 + i % 3}") for i in range(10)
+    ])
+
+    seen, cursor = [], None
+    while True:
+        query = "/api/tips?limit=3" + (f"&cursor={cursor}" if cursor else "")
+        data = client.get(query).json
+        seen.extend((tip["date"], tip["id"]) for tip in data["tips"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 10
+    assert seen == sorted(seen)
+
+
+def test_filters_apply_with_paging(web, no_tips):
+    web.betting_app.save_tips([
+        make_tip("Cheap", odds=1.5, confidence="LOW"),
+        make_tip("Mid", odds=2.5, confidence="MEDIUM"),
+        make_tip("Long", odds=4.0, confidence="HIGH", league="La Liga"),
+    ])
+
+    page, _ = web.betting_app.list_tips("pending", min_odds=2.0, confidence=["MEDIUM", "HIGH"])
+    assert sorted(tip["home_team"] for tip in page) == ["Long", "Mid"]
+
+    page, _ = web.betting_app.list_tips("pending", league="La Liga")
+    assert [tip["home_team"] for tip in page] == ["Long"]
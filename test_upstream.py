@@ -0,0 +1,88 @@
+"""Tests for the upstream client and its on-disk cache."""
+
+import os
+import time
+
+import pytest
+import requests
+
+import http_cache
+import upstream
+
+PATH = "/competitions/PL/matches"
+
+
+class FakeSession:
+    def __init__(self, status=None, error=None):
+        self.status = status
+        self.error = error
+
+    def get(self, url, **kwargs):
+        if self.error is not None:
+            raise self.error
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b'{"fresh": true}'
+        return response
+
+
+@pytest.fixture
+def cached(monkeypatch):
+    """A cached copy for PATH, due for revalidation; returns a session installer."""
+    url = upstream.PROVIDERS["football_data"]["base_url"] + PATH
+    key = http_cache.cache_key(url, None)
+    http_cache.store(key, url, '{"cached": true}')
+
+    def install(**kwargs):
+        monkeypatch.setattr(upstream, "get_session", lambda: FakeSession(**kwargs))
+
+    yield install
+    http_cache._remove(http_cache._path(key))
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_upstream_failure_serves_the_stale_copy(cached, status):
+    cached(status=status)
+    response = upstream.get("football_data", PATH, ttl=0)
+    assert response.status_code == 200
+    assert response.from_cache
+    assert response.json() == {"cached": True}
+
+
+def test_connection_error_serves_the_stale_copy(cached):
+    cached(error=requests.ConnectionError("down"))
+    assert upstream.get("football_data", PATH, ttl=0).from_cache
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404])
+def test_client_errors_are_not_hidden(cached, status):
+    cached(status=status)
+    response = upstream.get("football_data", PATH, ttl=0)
+    assert response.status_code == status
+    assert not response.from_cache
+
+
+def test_expired_entries_are_deleted(web):
+    http_cache.store("old", "u", "x")
+    entry = http_cache.load("old")
+    entry["fetched_at"] -= http_cache.MAX_AGE + 1
+    http_cache._write("old", entry)
+
+    assert http_cache.load("old") is None
+    assert not os.path.exists(http_cache._path("old"))
+
+
+def test_sweep_removes_old_files(web, monkeypatch):
+    http_cache.store("stale", "u", "x")
+    leftover = os.path.join(http_cache.cache_dir(), "partial.tmp")
+    open(leftover, "w").close()
+    old = time.time() - http_cache.MAX_AGE - 5
+    for path in (http_cache._path("stale"), leftover):
+        os.utime(path, (old, old))
+
+    monkeypatch.setattr(http_cache, "_last_sweep", 0.0)
+    http_cache.store("new", "u", "y")
+
+    assert not os.path.exists(http_cache._path("stale"))
+    assert not os.path.exists(leftover)
+    assert http_cache.load("new")["body"] == "y"
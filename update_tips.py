@@ -7,12 +7,31 @@ Run locally to update tips on Render.
 
 import requests
 import json
+import time
 from datetime import datetime
 
 # Your deployed app URL
 DEPLOYED_URL = "https://tippy-v8lb.onrender.com"
 LOCAL_URL = "http://localhost:5000"
 
+def wait_for_job(status_url, timeout=300):
+    """Poll a background job until it finishes and return its result."""
+    deadline = time.time() + timeout
+    
+    while time.time() < deadline:
+        job = requests.get(status_url, timeout=10).json()
+        
+        if job["status"] == "done":
+            return job["result"]
+        if job["status"] == "failed":
+            raise RuntimeError(job.get("error") or "job failed")
+        
+        stages = ", ".join(f"{s['name']}={s['status']}" for s in job.get("stages", []))
+        print(f"   ⏳ {job['status']} {stages}")
+        time.sleep(2)
+    
+    raise TimeoutError(f"job did not finish within {timeout}s")
+
 def trigger_analysis():
     """Trigger analysis on deployed app."""
     print("\n" + "="*70)
@@ -28,10 +47,10 @@ def trigger_analysis():
         try:
             # Trigger analysis
             print("📡 Running ML analysis...")
-            response = requests.post(f"{url}/api/analyze", timeout=60)
+            response = requests.post(f"{url}/api/analyze", timeout=30)
             
-            if response.status_code == 200:
-                data = response.json()
+            if response.status_code == 202:
+                data = wait_for_job(f"{url}{response.json()['status_url']}")
                 tips = data.get('tips', [])
                 stats = data.get('stats', {})
                 
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Betting Pro AI - Upstream API Client
+====================================
+Shared keep-alive HTTP sessions and concurrent fetching for the
+Football-Data and Odds APIs, with per-provider timeouts. GETs go
+through the on-disk http_cache: fresh entries cost no request, stale
+ones are revalidated with ETag/Last-Modified, and the last good copy
+is served when the upstream fails.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+import http_cache
+
+# Provider endpoints and (connect, read) timeouts in seconds
+PROVIDERS = {
+    "football_data": {
+        "base_url": "https://api.football-data.org/v4",
+        "timeout": (3.05, 10),
+    },
+    "odds_api": {
+        "base_url": "https://api.the-odds-api.com/v4",
+        "timeout": (3.05, 12),
+    },
+}
+
+# Fresh lifetime of cached responses per (provider, path), in seconds
+CACHE_TTLS = {
+    ("football_data", "/matches"): 300,
+    ("odds_api", "/sports/football/odds"): 120,
+}
+DEFAULT_TTL = 60
+MAX_STALE = http_cache.MAX_AGE   # oldest copy served when the upstream is down
+
+POOL_SIZE = 8
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_executor = None
+_executor_pid = None
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide keep-alive session, rebuilt after fork."""
+    global _session, _session_pid
+
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+
+            # Retry idempotent GETs on connection errors and 502/503/504 only
+            retry = Retry(
+                total=2,
+                connect=2,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset(["GET"]),
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=len(PROVIDERS), pool_maxsize=POOL_SIZE, max_retries=retry)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            _session = session
+            _session_pid = os.getpid()
+
+        return _session
+
+
+def get(provider: str, path: str, params: Optional[Dict] = None,
+        headers: Optional[Dict] = None, ttl: Optional[float] = None) -> requests.Response:
+    """GET path from a provider through the shared session and disk cache.
+
+    The returned response has from_cache set when it was served from disk.
+    """
+    config = PROVIDERS[provider]
+    url = config["base_url"] + path
+    ttl = CACHE_TTLS.get((provider, path), DEFAULT_TTL) if ttl is None else ttl
+
+    key = http_cache.cache_key(url, params)
+    entry = http_cache.load(key)
+
+    if entry is not None and http_cache.age(entry) < ttl:
+        return _cached_response(entry)
+
+    # Revalidate what we have instead of paying for the full payload
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = get_session().get(
+            url,
+            params=params,
+            headers=request_headers,
+            timeout=config["timeout"]
+        )
+    except requests.RequestException:
+        if _usable_stale(entry):
+            return _cached_response(entry)
+        raise
+
+    if response.status_code == 304 and entry is not None:
+        return _cached_response(http_cache.touch(key, entry))
+
+    if response.status_code == 200:
+        http_cache.store(
+            key, url, response.text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+        response.from_cache = False
+        return response
+
+    # Rate limited or upstream error: fall back to the last good copy.
+    # Other 4xx (bad or expired key, bad request) are ours to see
+    if _retryable(response.status_code) and _usable_stale(entry):
+        return _cached_response(entry)
+
+    response.from_cache = False
+    return response
+
+
+def _retryable(status: int) -> bool:
+    """Whether a failed status is the upstream's problem rather than the request's."""
+    return status == 429 or status >= 500
+
+
+def _usable_stale(entry: Optional[Dict]) -> bool:
+    """Whether a cached entry is recent enough to serve on upstream failure."""
+    return entry is not None and http_cache.age(entry) < MAX_STALE
+
+
+def _cached_response(entry: Dict) -> requests.Response:
+    """Rebuild a 200 Response from a cache entry."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = entry["url"]
+    response.encoding = "utf-8"
+    response._content = entry["body"].encode("utf-8")
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    response.from_cache = True
+    return response
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide fetch pool, rebuilt after fork."""
+    global _executor, _executor_pid
+
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="upstream")
+            _executor_pid = os.getpid()
+
+        return _executor
+
+
+def deadline() -> float:
+    """Longest any single provider call may take, in seconds."""
+    return max(sum(config["timeout"]) for config in PROVIDERS.values())
+
+
+def fetch_concurrently(jobs: Dict[str, Callable]) -> Dict[str, Dict]:
+    """Run independent fetch callables in parallel.
+
+    Returns {name: {"result", "error", "ms"}} once every job has finished
+    or the slowest provider's deadline has passed, whichever is first.
+    """
+    executor = _get_executor()
+    started = time.perf_counter()
+
+    def timed(fn):
+        start = time.perf_counter()
+        try:
+            return fn(), None, (time.perf_counter() - start) * 1000
+        except Exception as e:
+            return None, e, (time.perf_counter() - start) * 1000
+
+    futures = {name: executor.submit(timed, fn) for name, fn in jobs.items()}
+    wait(futures.values(), timeout=deadline())
+
+    outcomes = {}
+    for name, future in futures.items():
+        if future.done():
+            result, error, ms = future.result()
+        else:
+            result, error = None, TimeoutError(f"{name} exceeded {deadline():.0f}s")
+            ms = (time.perf_counter() - started) * 1000
+        outcomes[name] = {"result": result, "error": error, "ms": round(ms, 1)}
+
+    return outcomes
@@ -5,7 +5,7 @@ Betting Pro AI - Flask Web Server
 API server for the betting tips web app.
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 import json
 import os
@@ -14,150 +14,237 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app import BettingApp, CONFIG, DB_PATH
+import aggregates
+import assets
+import db
+import jobs
+import odds_history
+import risk
+import stream
+from app import BettingApp, CONFIG, SETTINGS, InvalidCursor
+from response_cache import versioned
 
+# /static is served by assets.send_static, not Flask's built-in route
 app = Flask(__name__, 
-            static_folder='static',
+            static_folder=None,
             template_folder='templates')
 CORS(app)
 
 # Initialize app
 betting_app = BettingApp()
 
+@app.before_request
+def sync_shared_state():
+    """Pick up settings and ratings changed by another worker; two meta lookups when unchanged."""
+    SETTINGS.refresh()
+    betting_app.refresh_teams()
+
 # Serve static files
 @app.route('/')
 def index():
-    return send_from_directory('templates', 'index.html')
+    return assets.send_page('index.html')
 
 @app.route('/static/<path:path>')
 def serve_static(path):
-    return send_from_directory('static', path)
+    return assets.send_static(path)
+
+# Keyset pagination
+MAX_PAGE_SIZE = 500
+TIP_FILTER_ARGS = ('league', 'confidence', 'min_odds', 'max_odds', 'date_from', 'date_to', 'cursor', 'limit')
+
+def tip_filters(default_limit: int) -> dict:
+    """Read list_tips filters and paging from the query string."""
+    confidence = request.args.get('confidence')
+    
+    return {
+        'league': request.args.get('league'),
+        'confidence': confidence.upper().split(',') if confidence else None,
+        'min_odds': request.args.get('min_odds', type=float),
+        'max_odds': request.args.get('max_odds', type=float),
+        'date_from': request.args.get('date_from'),
+        'date_to': request.args.get('date_to'),
+        'cursor': request.args.get('cursor'),
+        'limit': max(1, min(request.args.get('limit', default_limit, type=int), MAX_PAGE_SIZE))
+    }
 
 # API Routes
+def summary_stats(stats):
+    """Headline numbers from get_performance, as the page's stats bar reads them."""
+    return {
+        'total_tips': stats['total_tips'],
+        'pending': stats['pending'],
+        'resulted': stats['resulted'],
+        'wins': stats['wins'],
+        'accuracy': stats['accuracy'],
+        'roi': stats['roi'],
+        'roi_pct': stats['roi_pct'],
+        'profit': round(stats['roi'], 2)
+    }
+
 @app.route('/api/tips')
+@versioned
 def get_tips():
-    """Get all current tips."""
+    """Get current tips; any filter or paging arg switches to (date, id) pages."""
     try:
-        # Load tips from database
-        import sqlite3
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        next_cursor = None
         
-        cursor.execute("SELECT * FROM tips WHERE status = 'pending' ORDER BY edge DESC")
-        tips = cursor.fetchall()
-        conn.close()
-        
-        tips_data = []
-        for tip in tips:
-            tips_data.append({
-                'id': tip[0],
-                'home_team': tip[1],
-                'away_team': tip[2],
-                'league': tip[3],
-                'date': tip[4],
-                'prediction': tip[5],
-                'confidence': tip[6],
-                'edge': tip[7],
-                'kelly_pct': tip[8],
-                'kelly_units': tip[9],
-                'odds': tip[10],
-                'status': tip[11]
-            })
+        if any(arg in request.args for arg in TIP_FILTER_ARGS):
+            tips_data, next_cursor = betting_app.list_tips(
+                'pending', descending=False, **tip_filters(default_limit=100)
+            )
+        else:
+            # Load tips from database
+            tips = db.query("SELECT * FROM tips WHERE status = 'pending' ORDER BY edge DESC")
+            
+            tips_data = []
+            for tip in tips:
+                tips_data.append({
+                    'id': tip[0],
+                    'home_team': tip[1],
+                    'away_team': tip[2],
+                    'league': tip[3],
+                    'date': tip[4],
+                    'prediction': tip[5],
+                    'confidence': tip[6],
+                    'edge': tip[7],
+                    'kelly_pct': tip[8],
+                    'kelly_units': tip[9],
+                    'odds': tip[10],
+                    'status': tip[11]
+                })
         
         # Get stats
         stats = betting_app.get_performance()
         
         return jsonify({
             'tips': tips_data,
-            'stats': {
-                'total_tips': stats['total_tips'],
-                'pending': stats['pending'],
-                'resulted': stats['resulted'],
-                'wins': stats['wins'],
-                'accuracy': stats['accuracy'],
-                'roi': stats['roi'],
-                'roi_pct': stats['roi_pct'],
-                'profit': round(stats['roi'], 2)
-            }
+            'next_cursor': next_cursor,
+            'stats': summary_stats(stats)
         })
     
+    except InvalidCursor:
+        return jsonify({'error': 'invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-# Demo mode endpoint
+# Demo data used when API limits are reached
+DEMO_TIPS = [
+    {'home_team': 'Manchester City', 'away_team': 'Liverpool', 'league': 'Premier League', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'HIGH', 'edge': 28.5, 'kelly_pct': 4.2, 'kelly_units': 42, 'odds': 2.15},
+    {'home_team': 'Bayern Munich', 'away_team': 'Dortmund', 'league': 'Bundesliga', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'HIGH', 'edge': 24.3, 'kelly_pct': 5.1, 'kelly_units': 51, 'odds': 1.95},
+    {'home_team': 'Real Madrid', 'away_team': 'Barcelona', 'league': 'La Liga', 'date': '2026-02-16', 'prediction': 'Draw', 'confidence': 'MEDIUM', 'edge': 18.7, 'kelly_pct': 3.2, 'kelly_units': 32, 'odds': 3.40},
+    {'home_team': 'Inter Milan', 'away_team': 'Juventus', 'league': 'Serie A', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'MEDIUM', 'edge': 15.2, 'kelly_pct': 2.8, 'kelly_units': 28, 'odds': 2.45},
+    {'home_team': 'PSG', 'away_team': 'Monaco', 'league': 'Ligue 1', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'MEDIUM', 'edge': 12.5, 'kelly_pct': 2.1, 'kelly_units': 21, 'odds': 1.75},
+    {'home_team': 'Arsenal', 'away_team': 'Tottenham', 'league': 'Premier League', 'date': '2026-02-16', 'prediction': 'Home Win', 'confidence': 'HIGH', 'edge': 22.1, 'kelly_pct': 4.8, 'kelly_units': 48, 'odds': 1.88}
+]
+DEMO_STATS = {'total_tips': 156, 'pending': 12, 'resulted': 144, 'wins': 90, 'accuracy': 62.5, 'roi': 1520, 'roi_pct': 15.2, 'profit': 1520}
+
 @app.route('/api/demo-tips')
 def get_demo_tips():
     """Get demo tips when API limits are reached."""
-    demo_tips = [
-        {'home_team': 'Manchester City', 'away_team': 'Liverpool', 'league': 'Premier League', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'HIGH', 'edge': 28.5, 'kelly_pct': 4.2, 'kelly_units': 42, 'odds': 2.15},
-        {'home_team': 'Bayern Munich', 'away_team': 'Dortmund', 'league': 'Bundesliga', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'HIGH', 'edge': 24.3, 'kelly_pct': 5.1, 'kelly_units': 51, 'odds': 1.95},
-        {'home_team': 'Real Madrid', 'away_team': 'Barcelona', 'league': 'La Liga', 'date': '2026-02-16', 'prediction': 'Draw', 'confidence': 'MEDIUM', 'edge': 18.7, 'kelly_pct': 3.2, 'kelly_units': 32, 'odds': 3.40},
-        {'home_team': 'Inter Milan', 'away_team': 'Juventus', 'league': 'Serie A', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'MEDIUM', 'edge': 15.2, 'kelly_pct': 2.8, 'kelly_units': 28, 'odds': 2.45},
-        {'home_team': 'PSG', 'away_team': 'Monaco', 'league': 'Ligue 1', 'date': '2026-02-15', 'prediction': 'Home Win', 'confidence': 'MEDIUM', 'edge': 12.5, 'kelly_pct': 2.1, 'kelly_units': 21, 'odds': 1.75},
-        {'home_team': 'Arsenal', 'away_team': 'Tottenham', 'league': 'Premier League', 'date': '2026-02-16', 'prediction': 'Home Win', 'confidence': 'HIGH', 'edge': 22.1, 'kelly_pct': 4.8, 'kelly_units': 48, 'odds': 1.88}
-    ]
-    demo_stats = {'total_tips': 156, 'pending': 12, 'resulted': 144, 'wins': 90, 'accuracy': 62.5, 'roi': 1520, 'roi_pct': 15.2, 'profit': 1520}
-    return jsonify({'tips': demo_tips, 'stats': demo_stats, 'mode': 'demo', 'message': 'Demo mode - Connect API keys for real tips'})
+    return jsonify({'tips': DEMO_TIPS, 'stats': DEMO_STATS, 'mode': 'demo', 'message': 'Demo mode - Connect API keys for real tips'})
+
+def analysis_job(job):
+    """Background analysis run; the result is what /api/analyze used to return."""
+    tips = betting_app.run_analysis(stage=job.stage)
+    
+    tips_data = []
+    for tip in tips:
+        tips_data.append({
+            'home_team': tip.match.home_team,
+            'away_team': tip.match.away_team,
+            'league': tip.match.league,
+            'date': tip.match.date,
+            'time': tip.match.time,
+            'prediction': tip.prediction,
+            'confidence': tip.confidence,
+            'edge': tip.edge,
+            'kelly_pct': tip.kelly_pct,
+            'kelly_units': tip.kelly_units,
+            'odds': tip.odds
+        })
+    
+    # If no tips generated, use demo
+    if not tips_data:
+        return {
+            'tips': DEMO_TIPS,
+            'stats': DEMO_STATS,
+            'mode': 'demo'
+        }
+    
+    with job.stage('stats'):
+        stats = betting_app.get_performance()
+    
+    result = {
+        'tips': tips_data,
+        'stats': summary_stats(stats),
+        'mode': 'live'
+    }
+    
+    stream.publish('analysis', result)
+    return result
 
-DEMO_TIPS = demo_tips
-DEMO_STATS = demo_stats
+def settlement_job(job):
+    """Background results update."""
+    settled = betting_app.update_results(stage=job.stage)
+    
+    stream.publish('settlement', {'settled': settled, 'stats': summary_stats(betting_app.get_performance())})
+    return {'success': True, 'settled': len(settled)}
+
+def start_job(kind, fn):
+    """Start a single-flight job and point the client at its status URL."""
+    job_id, started = jobs.submit(kind, fn)
+    
+    return jsonify({
+        'job_id': job_id,
+        'status_url': f'/api/jobs/{job_id}',
+        'deduplicated': not started
+    }), 202
 
 @app.route('/api/analyze', methods=['POST'])
 def run_analysis():
-    """Run full analysis and generate tips."""
+    """Start a background analysis run (or join the one in progress)."""
     try:
-        tips = betting_app.run_analysis()
-        
-        tips_data = []
-        for tip in tips:
-            tips_data.append({
-                'home_team': tip.match.home_team,
-                'away_team': tip.match.away_team,
-                'league': tip.match.league,
-                'date': tip.match.date,
-                'time': tip.match.time,
-                'prediction': tip.prediction,
-                'confidence': tip.confidence,
-                'edge': tip.edge,
-                'kelly_pct': tip.kelly_pct,
-                'kelly_units': tip.kelly_units,
-                'odds': tip.odds
-            })
-        
-        # If no tips generated, use demo
-        if not tips_data:
-            return jsonify({
-                'tips': DEMO_TIPS,
-                'stats': DEMO_STATS,
-                'mode': 'demo'
-            })
-        
-        stats = betting_app.get_performance()
-        
-        return jsonify({
-            'tips': tips_data,
-            'stats': {
-                'total_tips': stats['total_tips'],
-                'pending': stats['pending'],
-                'resulted': stats['resulted'],
-                'wins': stats['wins'],
-                'accuracy': stats['accuracy'],
-                'roi': stats['roi'],
-                'roi_pct': stats['roi_pct'],
-                'profit': round(stats['roi'], 2)
-            },
-            'mode': 'live'
-        })
-    
+        return start_job('analysis', analysis_job)
     except Exception as e:
-        return jsonify({
-            'tips': DEMO_TIPS,
-            'stats': DEMO_STATS,
-            'mode': 'demo',
-            'error': str(e)
-        })
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Report a background job's status, stage timings and result."""
+    job = jobs.get(job_id)
+    
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+    
+    return jsonify(job)
+
+@app.route('/api/stream')
+def live_stream():
+    """Server-Sent Events: analysis, settlement and settings deltas as they happen."""
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    
+    # HEAD never iterates the body, so it must not take a slot
+    if request.method == 'HEAD':
+        return Response(mimetype='text/event-stream', headers=headers)
+    
+    # Every open stream holds a request thread; past the limit the page polls
+    if not stream.reserve():
+        return jsonify({'error': 'too many live streams'}), 503, {'Retry-After': '300'}
+    
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    
+    # The server closes the response whether or not the body was ever read,
+    # so the slot comes back even if the client left before the first chunk
+    response = Response(
+        stream_with_context(stream.listen(last_id)),
+        mimetype='text/event-stream',
+        headers=headers
+    )
+    response.call_on_close(stream.release)
+    return response
 
 @app.route('/api/performance')
+@versioned
 def get_performance():
     """Get performance statistics."""
     try:
@@ -172,34 +259,109 @@ def get_performance():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/risk')
+@versioned
+def get_risk():
+    """Monte Carlo bankroll percentiles, e.g. ?paths=100000&bets=500&stake_scale=1.5."""
+    try:
+        paths = min(int(request.args.get('paths', risk.DEFAULT_PATHS)), risk.MAX_PATHS)
+        bets = min(int(request.args.get('bets', risk.DEFAULT_BETS)), risk.MAX_BETS)
+        max_kelly_pct = request.args.get('max_kelly_pct', type=float)
+        stake_scale = float(request.args.get('stake_scale', 1.0))
+        ruin_pct = float(request.args.get('ruin_pct', 50))
+        
+        if paths < 1 or bets < 1:
+            raise ValueError("paths and bets must be positive")
+        if paths * bets > risk.MAX_REQUEST_CELLS:
+            raise ValueError(f"paths x bets must be at most {risk.MAX_REQUEST_CELLS:,}")
+        # Written so NaN fails the checks too
+        if not 0 < stake_scale < float('inf'):
+            raise ValueError("stake_scale must be a positive number")
+        if not 0 < ruin_pct < 100:
+            raise ValueError("ruin_pct must be between 0 and 100, exclusive")
+        if max_kelly_pct is not None and not 0 < max_kelly_pct <= 1:
+            raise ValueError("max_kelly_pct must be above 0 and at most 1")
+        
+        return jsonify(risk.report(
+            paths, bets, CONFIG['bankroll'],
+            stake_scale=stake_scale,
+            max_kelly_pct=max_kelly_pct if max_kelly_pct is not None else CONFIG['max_kelly_pct'],
+            ruin_pct=ruin_pct
+        ))
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/line-movement')
+def get_line_movement():
+    """Price history for a fixture, e.g. ?home=Arsenal&away=Chelsea&date=2026-02-15&selection=1."""
+    try:
+        if not request.args.get('home') or not request.args.get('away'):
+            return jsonify({'error': 'home and away are required'}), 400
+        
+        event = odds_history.find_event(request.args['home'], request.args['away'], request.args.get('date'))
+        if event is None:
+            return jsonify({'error': 'No odds recorded for this fixture'}), 404
+        
+        return jsonify({
+            'event': event,
+            'opening_closing': odds_history.opening_closing(event['id']),
+            'movement': odds_history.movement(
+                event['id'], request.args.get('selection'), request.args.get('bookmaker')
+            )
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics')
+@versioned
+def get_analytics_slice():
+    """Roll up the analytics cube, e.g. ?group_by=league,month&confidence=HIGH."""
+    try:
+        group_by = [dim for dim in request.args.get('group_by', '').split(',') if dim]
+        filters = {dim: request.args[dim] for dim in aggregates.CUBE_DIMENSIONS if dim in request.args}
+        
+        rows = aggregates.read_cube(group_by, filters)
+        columns = group_by + ['count', 'wins', 'staked', 'profit', 'roi_pct']
+        
+        return jsonify({'analytics': [dict(zip(columns, row)) for row in rows]})
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/history')
+@versioned
 def get_history():
-    """Get betting history."""
+    """Get betting history, newest first, one keyset page at a time."""
     try:
-        import sqlite3
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM tips WHERE status = 'resulted' ORDER BY date DESC LIMIT 50")
-        history = cursor.fetchall()
-        conn.close()
+        history, next_cursor = betting_app.list_tips('resulted', **tip_filters(default_limit=50))
         
         history_data = []
         for bet in history:
             history_data.append({
-                'date': bet[4],
-                'home_team': bet[1],
-                'away_team': bet[2],
-                'prediction': bet[5],
-                'odds': bet[10],
-                'actual_outcome': bet[12],
-                'score': bet[13],
-                'win': bet[14],
-                'profit': round(bet[9] * (bet[10] - 1), 2) if bet[14] else round(-bet[9], 2)
+                'id': bet['id'],
+                'date': bet['date'],
+                'home_team': bet['home_team'],
+                'away_team': bet['away_team'],
+                'league': bet['league'],
+                'prediction': bet['prediction'],
+                'confidence': bet['confidence'],
+                'odds': bet['odds'],
+                'actual_outcome': bet['actual_outcome'],
+                'score': bet['score'],
+                'win': bet['win'],
+                'profit': round(bet['kelly_units'] * (bet['odds'] - 1), 2) if bet['win'] else round(-bet['kelly_units'], 2)
             })
         
-        return jsonify({'history': history_data})
+        return jsonify({'history': history_data, 'next_cursor': next_cursor})
     
+    except InvalidCursor:
+        return jsonify({'error': 'invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -208,60 +370,38 @@ def settings():
     """Get or update settings."""
     try:
         if request.method == 'POST':
-            new_settings = request.json
+            try:
+                new_settings = SETTINGS.update(request.get_json(silent=True))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
-            # Update config
-            if 'bankroll' in new_settings:
-                CONFIG['bankroll'] = new_settings['bankroll']
-            if 'kelly_fraction' in new_settings:
-                CONFIG['kelly_fraction'] = new_settings['kelly_fraction']
-            if 'max_kelly_pct' in new_settings:
-                CONFIG['max_kelly_pct'] = new_settings['max_kelly_pct']
-            if 'min_edge' in new_settings:
-                CONFIG['min_edge'] = new_settings['min_edge']
+            stream.publish('settings', new_settings)
             
-            # Save to database
-            import sqlite3
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            
-            for key, value in new_settings.items():
-                cursor.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", 
-                              (key, json.dumps(value)))
-            
-            conn.commit()
-            conn.close()
-            
-            return jsonify({'success': True})
+            return jsonify({'success': True, 'settings': SETTINGS.current()})
         
         else:
-            # Get settings
-            return jsonify({
-                'bankroll': CONFIG['bankroll'],
-                'kelly_fraction': CONFIG['kelly_fraction'],
-                'max_kelly_pct': CONFIG['max_kelly_pct'],
-                'min_edge': CONFIG['min_edge']
-            })
+            return jsonify(SETTINGS.current())
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/leagues')
+@versioned
 def get_leagues():
     """Get available leagues."""
     return jsonify({'leagues': betting_app.leagues})
 
 @app.route('/api/teams')
+@versioned
 def get_teams():
     """Get team intelligence."""
     return jsonify({'teams': betting_app.teams})
 
 @app.route('/api/update-results', methods=['POST'])
 def update_results():
-    """Update tip results."""
+    """Start a background results update (or join the one in progress)."""
     try:
-        betting_app.update_results()
-        return jsonify({'success': True})
+        return start_job('settlement', settlement_job)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -271,9 +411,9 @@ if __name__ == '__main__':
     print(f"  Version: {CONFIG['version']}")
     print(f"{'='*70}\n")
     
-    # Run analysis on startup
-    print("Running initial analysis...")
-    betting_app.run_analysis()
+    # Initial analysis runs in the background so the port binds at once
+    print("Starting initial analysis in the background...")
+    jobs.submit('analysis', analysis_job)
     
     # Start server
     print(f"\n🚀 Server running at: http://localhost:5000")